@@ -0,0 +1,520 @@
+"""Local stand-in for the Discord REST API (and the gateway events it causes).
+
+Only the routes the bot actually uses are implemented. Every request goes
+through simulated latency and per-route rate-limit buckets that answer with
+real 429s, so discord.py's own rate-limit handling is exercised. Mutations
+are echoed back to the bot as gateway events through `on_event`, which the
+runner wires to the client's `ConnectionState.parsers`.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import datetime
+from collections import Counter
+
+from aiohttp import web
+
+DISCORD_EPOCH = 1420070400000
+
+
+def _json_response(payload, status=200, headers=None):
+    # discord.py only decodes bodies whose content-type is exactly application/json.
+    headers = dict(headers or {}, **{"Content-Type": "application/json"})
+    return web.Response(body=json.dumps(payload).encode(), status=status, headers=headers)
+
+
+class Snowflakes:
+    def __init__(self):
+        self._counter = 0
+
+    def at(self, when: datetime.datetime) -> int:
+        self._counter = (self._counter + 1) % 4096
+        ms = int(when.timestamp() * 1000) - DISCORD_EPOCH
+        return (ms << 22) | self._counter
+
+    def now(self) -> int:
+        return self.at(datetime.datetime.now(datetime.timezone.utc))
+
+
+def _iso(snowflake: int) -> str:
+    ms = (snowflake >> 22) + DISCORD_EPOCH
+    return datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc).isoformat()
+
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id),
+        "username": name,
+        "global_name": name,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": bot,
+        "public_flags": 0,
+    }
+
+
+# --- Synthetic guild data ---
+SIZE_ROLES = ["Tiny", "Normal", "Giant", "Giantess"]
+SYSTEM_ROLES = ["Dead", "Spellcaster", "Owner", "Owners"]
+
+
+class FakeGuild:
+    def __init__(self, ids: Snowflakes, bot_user: dict, *, members: int, roles: int, channels: int,
+                 messages_per_channel: int, selectors_per_channel: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.id = ids.now()
+        self.name = f"Bench Guild {members}m/{roles}r"
+        self.bot_user = bot_user
+
+        # Roles: @everyone, the RP roles, filler roles, then the bot's managed role on top.
+        self.roles = {}
+        names = SIZE_ROLES + SYSTEM_ROLES
+        names += [f"Role {i}" for i in range(max(0, roles - len(names) - 2))]
+        self._add_role(self.id, "@everyone", 0, permissions="1071698660929")
+        for position, name in enumerate(names, start=1):
+            self._add_role(ids.now(), name, position)
+        self.bot_role_id = ids.now()
+        self._add_role(self.bot_role_id, "Demise", len(names) + 1, permissions="8", managed=True)
+        self.role_by_name = {r["name"]: int(r["id"]) for r in self.roles.values()}
+
+        # Channels with history; some messages are role selectors posted by the bot.
+        self.channels = {}
+        self.messages = {}
+        now = datetime.datetime.now(datetime.timezone.utc)
+        filler = [int(r["id"]) for r in self.roles.values() if r["name"].startswith("Role ")][:20]
+        for c in range(channels):
+            channel_id = ids.now()
+            self.channels[channel_id] = {
+                "id": str(channel_id), "type": 0, "name": f"channel-{c}", "position": c,
+                "guild_id": str(self.id), "permission_overwrites": [], "nsfw": False, "parent_id": None,
+            }
+            history = []
+            selector_slots = set(rng.sample(range(messages_per_channel), min(selectors_per_channel, messages_per_channel)))
+            for m in range(messages_per_channel):
+                # Spread messages over ~30 days so both bulk and single deletes happen.
+                when = now - datetime.timedelta(minutes=(messages_per_channel - m) * 30 * 24 * 60 / max(1, messages_per_channel))
+                message_id = ids.at(when)
+                if m in selector_slots:
+                    history.append(self.selector_message(message_id, channel_id, filler or [self.role_by_name["Tiny"]]))
+                else:
+                    history.append(self.message(message_id, channel_id, user_payload(ids.now(), "chatter"), f"message {m}"))
+            self.messages[channel_id] = history
+
+        # Members: everyone gets a random size role and a few filler roles.
+        self.members = {}
+        self.owner_id = None
+        for i in range(members):
+            user_id = ids.now()
+            member_roles = [self.role_by_name[rng.choice(SIZE_ROLES)]]
+            member_roles += rng.sample(filler, min(len(filler), rng.randint(0, 3)))
+            if i == 0:
+                member_roles += [self.role_by_name["Owner"], self.role_by_name["Owners"], self.role_by_name["Spellcaster"]]
+                self.owner_id = user_id
+            elif i % 7 == 0:
+                member_roles.append(self.role_by_name["Dead"])
+            self.members[user_id] = {
+                "user": user_payload(user_id, f"member{i}"),
+                "roles": [str(r) for r in member_roles],
+                "joined_at": _iso(user_id),
+                "deaf": False, "mute": False, "flags": 0, "nick": None,
+            }
+        self.members[int(bot_user["id"])] = {
+            "user": bot_user, "roles": [str(self.bot_role_id)], "joined_at": _iso(self.id),
+            "deaf": False, "mute": False, "flags": 0, "nick": None,
+        }
+
+    def _add_role(self, role_id, name, position, permissions="0", managed=False, colour=0):
+        self.roles[role_id] = {
+            "id": str(role_id), "name": name, "color": colour, "hoist": False, "position": position,
+            "colors": {"primary_color": colour, "secondary_color": None, "tertiary_color": None},
+            "permissions": permissions, "managed": managed, "mentionable": False, "flags": 0,
+        }
+
+    def message(self, message_id, channel_id, author, content="", embeds=(), components=()):
+        return {
+            "id": str(message_id), "channel_id": str(channel_id), "guild_id": str(self.id),
+            "author": author, "content": content, "timestamp": _iso(message_id), "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+            "embeds": list(embeds), "pinned": False, "type": 0, "components": list(components), "flags": 0,
+        }
+
+    def selector_message(self, message_id, channel_id, role_ids, multiple=True):
+        mode = "Multiple" if multiple else "Single"
+        select = {
+            "type": 3, "custom_id": f"role_dropdown_{'multi' if multiple else 'single'}",
+            "min_values": 0, "max_values": len(role_ids) if multiple else 1,
+            "options": [{"label": self.roles[r]["name"], "value": str(r)} for r in role_ids],
+        }
+        embed = {"type": "rich", "title": "🎭 Role Selector", "footer": {"text": f"Selection mode: {mode}"}}
+        return self.message(message_id, channel_id, self.bot_user, embeds=[embed],
+                            components=[{"type": 1, "components": [select]}])
+
+    def member_payload(self, member_id: int, with_permissions: bool = False) -> dict:
+        payload = dict(self.members[member_id])
+        if with_permissions:
+            perms = 0
+            for role_id in [self.id] + [int(r) for r in payload["roles"]]:
+                perms |= int(self.roles.get(role_id, {}).get("permissions", 0))
+            payload["permissions"] = str(perms)
+        return payload
+
+    def gateway_payload(self) -> dict:
+        """GUILD_CREATE-style payload used to seed the client cache."""
+        return {
+            "id": str(self.id), "name": self.name, "owner_id": str(self.owner_id), "icon": None,
+            "features": [], "emojis": [], "stickers": [], "unavailable": False, "large": len(self.members) > 250,
+            "member_count": len(self.members), "roles": list(self.roles.values()),
+            "channels": list(self.channels.values()), "members": list(self.members.values()),
+            "threads": [], "voice_states": [], "presences": [], "stage_instances": [],
+            "guild_scheduled_events": [], "premium_tier": 0, "preferred_locale": "en-US",
+            "system_channel_flags": 0, "verification_level": 0, "default_message_notifications": 0,
+            "explicit_content_filter": 0, "mfa_level": 0, "nsfw_level": 0, "afk_timeout": 300,
+        }
+
+    def rest_payload(self) -> dict:
+        """GET /guilds/{id} payload: the guild and its roles, without members or channels."""
+        payload = self.gateway_payload()
+        for key in ("channels", "members", "threads", "voice_states", "presences", "stage_instances",
+                    "guild_scheduled_events", "member_count", "large", "unavailable"):
+            payload.pop(key)
+        payload["approximate_member_count"] = len(self.members)
+        return payload
+
+
+# --- Rate limits ---
+class Bucket:
+    __slots__ = ("limit", "window", "remaining", "reset_at")
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self):
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        if self.remaining <= 0:
+            return False, self.reset_at - now
+        self.remaining -= 1
+        return True, self.reset_at - now
+
+
+ROUTES = [
+    # (method, regex, template, handler name)
+    ("GET", r"/users/@me", "/users/@me", "get_me"),
+    ("GET", r"/oauth2/applications/@me", "/oauth2/applications/@me", "get_application"),
+    ("PUT", r"/applications/(\d+)/commands", "/applications/{app}/commands", "sync_commands"),
+    ("PUT", r"/applications/(\d+)/guilds/(\d+)/commands", "/applications/{app}/guilds/{guild}/commands", "sync_commands"),
+    ("POST", r"/interactions/(\d+)/([^/]+)/callback", "/interactions/{id}/{token}/callback", "interaction_callback"),
+    ("POST", r"/webhooks/(\d+)/([^/]+)", "/webhooks/{id}/{token}", "followup_send"),
+    ("PATCH", r"/webhooks/(\d+)/([^/]+)/messages/([^/]+)", "/webhooks/{id}/{token}/messages/{message}", "followup_edit"),
+    ("GET", r"/guilds/(\d+)", "/guilds/{guild}", "get_guild"),
+    ("GET", r"/guilds/(\d+)/members", "/guilds/{guild}/members", "list_members"),
+    ("GET", r"/guilds/(\d+)/members/(\d+)", "/guilds/{guild}/members/{member}", "get_member"),
+    ("PATCH", r"/guilds/(\d+)/members/(\d+)", "/guilds/{guild}/members/{member}", "edit_member"),
+    ("PUT", r"/guilds/(\d+)/members/(\d+)/roles/(\d+)", "/guilds/{guild}/members/{member}/roles/{role}", "add_member_role"),
+    ("DELETE", r"/guilds/(\d+)/members/(\d+)/roles/(\d+)", "/guilds/{guild}/members/{member}/roles/{role}", "remove_member_role"),
+    ("POST", r"/guilds/(\d+)/roles", "/guilds/{guild}/roles", "create_role"),
+    ("PATCH", r"/guilds/(\d+)/roles", "/guilds/{guild}/roles", "edit_role_positions"),
+    ("PATCH", r"/guilds/(\d+)/roles/(\d+)", "/guilds/{guild}/roles/{role}", "edit_role"),
+    ("DELETE", r"/guilds/(\d+)/roles/(\d+)", "/guilds/{guild}/roles/{role}", "delete_role"),
+    ("GET", r"/channels/(\d+)/messages", "/channels/{channel}/messages", "list_messages"),
+    ("POST", r"/channels/(\d+)/messages", "/channels/{channel}/messages", "send_message"),
+    ("POST", r"/channels/(\d+)/messages/bulk-delete", "/channels/{channel}/messages/bulk-delete", "bulk_delete"),
+    ("PATCH", r"/channels/(\d+)/messages/(\d+)", "/channels/{channel}/messages/{message}", "edit_message"),
+    ("DELETE", r"/channels/(\d+)/messages/(\d+)", "/channels/{channel}/messages/{message}", "delete_message"),
+]
+_COMPILED = [(m, re.compile(f"^/api/v\\d+{rx}$"), tpl, h) for m, rx, tpl, h in ROUTES]
+UNLIMITED = {"interaction_callback", "get_me", "get_application"}
+
+
+class FakeDiscord:
+    def __init__(self, *, latency: float = 0.03, jitter: float = 0.01, rate_limit: int = 10,
+                 rate_window: float = 1.0, seed: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rng = random.Random(seed)
+        self.ids = Snowflakes()
+        self.application_id = self.ids.now()
+        self.bot_user = user_payload(self.application_id, "Demise", bot=True)
+        self.owner_user = user_payload(self.ids.now(), "bench-owner")
+        self.guilds = {}
+        self.calls = Counter()
+        self.ratelimited = Counter()
+        self.followups = {}  # interaction token -> monotonic time of the first follow-up
+        self.on_event = lambda name, data: None
+        self._buckets = {}
+        self._runner = None
+        self.port = None
+
+    def add_guild(self, **kwargs) -> FakeGuild:
+        guild = FakeGuild(self.ids, self.bot_user, **kwargs)
+        self.guilds[guild.id] = guild
+        return guild
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.ratelimited.clear()
+        self.followups.clear()
+
+    # --- Server ---
+    async def start(self, port: int = 0):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.dispatch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{self.port}/api/v10"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def dispatch(self, request: web.Request):
+        for method, rx, template, handler in _COMPILED:
+            if method != request.method:
+                continue
+            match = rx.match(request.path)
+            if match:
+                break
+        else:
+            return _json_response({"message": "404: Not Found", "code": 0}, status=404)
+
+        route = f"{method} {template}"
+        self.calls[route] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+
+        headers = {}
+        if handler not in UNLIMITED:
+            major = match.group(1) if match.groups() else ""
+            key = (route, major)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = Bucket(self.rate_limit, self.rate_window)
+            ok, reset_after = bucket.take()
+            headers = {
+                "X-RateLimit-Limit": str(bucket.limit),
+                "X-RateLimit-Remaining": str(max(0, bucket.remaining)),
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+                "X-RateLimit-Bucket": f"{abs(hash(route)):x}",
+            }
+            if not ok:
+                self.ratelimited[route] += 1
+                headers["Via"] = "1.1 google"
+                headers["Retry-After"] = f"{reset_after:.3f}"
+                return _json_response(
+                    {"message": "You are being rate limited.", "retry_after": round(reset_after, 3), "global": False},
+                    status=429, headers=headers,
+                )
+
+        body = None
+        if request.can_read_body and request.content_type == "application/json":
+            body = await request.json()
+        status, payload = await getattr(self, handler)(request, body, *match.groups())
+        if payload is None:
+            return web.Response(status=status if status != 200 else 204, headers=headers)
+        return _json_response(payload, status=status, headers=headers)
+
+    # --- Helpers ---
+    def _guild(self, guild_id) -> FakeGuild:
+        return self.guilds[int(guild_id)]
+
+    def _channel_guild(self, channel_id) -> FakeGuild:
+        for guild in self.guilds.values():
+            if int(channel_id) in guild.channels:
+                return guild
+        raise KeyError(channel_id)
+
+    def _member_update(self, guild: FakeGuild, member_id: int):
+        data = dict(guild.members[member_id], guild_id=str(guild.id))
+        self.on_event("GUILD_MEMBER_UPDATE", data)
+
+    # --- Handlers ---
+    async def get_me(self, request, body):
+        return 200, self.bot_user
+
+    async def get_application(self, request, body):
+        return 200, {
+            "id": str(self.application_id), "name": "Demise", "icon": None, "description": "",
+            "bot_public": True, "bot_require_code_grant": False, "owner": self.owner_user,
+            "verify_key": "0" * 64, "flags": 0, "summary": "", "rpc_origins": [], "team": None,
+        }
+
+    async def sync_commands(self, request, body, application_id, guild_id=None):
+        return 200, [
+            dict(command, id=str(self.ids.now()), application_id=application_id, version=str(self.ids.now()),
+                 **({"guild_id": guild_id} if guild_id else {}))
+            for command in body or []
+        ]
+
+    async def interaction_callback(self, request, body, interaction_id, token):
+        response_type = body.get("type") if body else 4
+        data = (body or {}).get("data") or {}
+        message_id = self.ids.now()
+        payload = {
+            "interaction": {
+                "id": interaction_id, "type": 2,
+                "response_message_id": str(message_id),
+                "response_message_loading": response_type == 5,
+                "response_message_ephemeral": bool(data.get("flags", 0) & 64),
+            },
+        }
+        return 200, payload
+
+    async def followup_send(self, request, body, application_id, token):
+        self.followups.setdefault(token, time.monotonic())
+        message_id = self.ids.now()
+        return 200, {
+            "id": str(message_id), "channel_id": "0", "author": self.bot_user,
+            "content": (body or {}).get("content") or "", "timestamp": _iso(message_id), "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+            "embeds": (body or {}).get("embeds") or [], "pinned": False, "type": 0, "flags": 64,
+            "webhook_id": str(application_id),
+        }
+
+    async def followup_edit(self, request, body, application_id, token, message_id):
+        message_id = self.ids.now() if message_id == "@original" else int(message_id)
+        return 200, {
+            "id": str(message_id), "channel_id": "0", "author": self.bot_user,
+            "content": (body or {}).get("content") or "", "timestamp": _iso(message_id),
+            "edited_timestamp": _iso(self.ids.now()), "tts": False, "mention_everyone": False, "mentions": [],
+            "mention_roles": [], "attachments": [], "embeds": (body or {}).get("embeds") or [], "pinned": False,
+            "type": 0, "flags": 64, "webhook_id": str(application_id),
+        }
+
+    async def get_guild(self, request, body, guild_id):
+        return 200, self._guild(guild_id).rest_payload()
+
+    async def list_members(self, request, body, guild_id):
+        guild = self._guild(guild_id)
+        limit = min(1000, int(request.query.get("limit", 1)))
+        after = int(request.query.get("after", 0))
+        ids = sorted(m for m in guild.members if m > after)[:limit]
+        return 200, [guild.members[m] for m in ids]
+
+    async def get_member(self, request, body, guild_id, member_id):
+        guild = self._guild(guild_id)
+        if int(member_id) not in guild.members:
+            return 404, {"message": "Unknown Member", "code": 10007}
+        return 200, guild.members[int(member_id)]
+
+    async def edit_member(self, request, body, guild_id, member_id):
+        guild = self._guild(guild_id)
+        member = guild.members[int(member_id)]
+        if body and "roles" in body:
+            member["roles"] = [str(r) for r in body["roles"] if int(r) in guild.roles and int(r) != guild.id]
+        self._member_update(guild, int(member_id))
+        return 200, member
+
+    async def add_member_role(self, request, body, guild_id, member_id, role_id):
+        guild = self._guild(guild_id)
+        member = guild.members[int(member_id)]
+        if role_id not in member["roles"]:
+            member["roles"].append(role_id)
+        self._member_update(guild, int(member_id))
+        return 204, None
+
+    async def remove_member_role(self, request, body, guild_id, member_id, role_id):
+        guild = self._guild(guild_id)
+        member = guild.members[int(member_id)]
+        if role_id in member["roles"]:
+            member["roles"].remove(role_id)
+        self._member_update(guild, int(member_id))
+        return 204, None
+
+    async def create_role(self, request, body, guild_id):
+        guild = self._guild(guild_id)
+        role_id = self.ids.now()
+        for role in guild.roles.values():
+            if role["position"] >= 1 and not role["id"] == str(guild.id):
+                role["position"] += 1
+        guild._add_role(role_id, (body or {}).get("name", "new role"), 1, colour=(body or {}).get("colors", {}).get("primary_color", 0))
+        self.on_event("GUILD_ROLE_CREATE", {"guild_id": str(guild.id), "role": guild.roles[role_id]})
+        return 200, guild.roles[role_id]
+
+    async def edit_role(self, request, body, guild_id, role_id):
+        guild = self._guild(guild_id)
+        role = guild.roles[int(role_id)]
+        for key in ("name", "color", "hoist", "mentionable", "permissions"):
+            if body and key in body:
+                role[key] = body[key]
+        if body and "colors" in body:
+            role["colors"].update(body["colors"])
+            role["color"] = role["colors"]["primary_color"]
+        self.on_event("GUILD_ROLE_UPDATE", {"guild_id": str(guild.id), "role": role})
+        return 200, role
+
+    async def edit_role_positions(self, request, body, guild_id):
+        guild = self._guild(guild_id)
+        for entry in body or []:
+            role = guild.roles[int(entry["id"])]
+            role["position"] = entry["position"]
+            self.on_event("GUILD_ROLE_UPDATE", {"guild_id": str(guild.id), "role": role})
+        return 200, list(guild.roles.values())
+
+    async def delete_role(self, request, body, guild_id, role_id):
+        guild = self._guild(guild_id)
+        guild.roles.pop(int(role_id), None)
+        for member in guild.members.values():
+            if role_id in member["roles"]:
+                member["roles"].remove(role_id)
+        self.on_event("GUILD_ROLE_DELETE", {"guild_id": str(guild.id), "role_id": role_id})
+        return 204, None
+
+    async def list_messages(self, request, body, channel_id):
+        guild = self._channel_guild(channel_id)
+        history = guild.messages[int(channel_id)]
+        limit = min(100, int(request.query.get("limit", 50)))
+        before = request.query.get("before")
+        after = request.query.get("after")
+        if after is not None and before is None:
+            # Oldest-first paging, as discord.py requests it with `after`.
+            page = [m for m in history if int(m["id"]) > int(after)][:limit]
+            return 200, list(reversed(page))
+        candidates = [m for m in history if before is None or int(m["id"]) < int(before)]
+        if after is not None:
+            candidates = [m for m in candidates if int(m["id"]) > int(after)]
+        return 200, list(reversed(candidates[-limit:]))
+
+    async def send_message(self, request, body, channel_id):
+        guild = self._channel_guild(channel_id)
+        message = guild.message(self.ids.now(), int(channel_id), self.bot_user, (body or {}).get("content") or "",
+                                (body or {}).get("embeds") or [], (body or {}).get("components") or [])
+        guild.messages[int(channel_id)].append(message)
+        return 200, message
+
+    async def edit_message(self, request, body, channel_id, message_id):
+        guild = self._channel_guild(channel_id)
+        for message in guild.messages[int(channel_id)]:
+            if message["id"] == message_id:
+                for key in ("content", "embeds", "components"):
+                    if body and key in body:
+                        message[key] = body[key]
+                return 200, message
+        return 404, {"message": "Unknown Message", "code": 10008}
+
+    async def delete_message(self, request, body, channel_id, message_id):
+        guild = self._channel_guild(channel_id)
+        history = guild.messages[int(channel_id)]
+        guild.messages[int(channel_id)] = [m for m in history if m["id"] != message_id]
+        self.on_event("MESSAGE_DELETE", {"id": message_id, "channel_id": channel_id, "guild_id": str(guild.id)})
+        return 204, None
+
+    async def bulk_delete(self, request, body, channel_id):
+        guild = self._channel_guild(channel_id)
+        ids = set((body or {}).get("messages", []))
+        if not 2 <= len(ids) <= 100:
+            return 400, {"message": "Invalid Form Body", "code": 50035}
+        guild.messages[int(channel_id)] = [m for m in guild.messages[int(channel_id)] if m["id"] not in ids]
+        self.on_event("MESSAGE_DELETE_BULK", {"ids": list(ids), "channel_id": channel_id, "guild_id": str(guild.id)})
+        return 204, None
@@ -0,0 +1,444 @@
+"""Offline benchmark for the bot's hot paths.
+
+Runs the real handlers (size_interaction via /step, /change_size,
+RoleDropdown.callback, /roles_setup, setup_persistent_views and /cleanup)
+against a local fake Discord API (bench/fake_discord.py) and reports
+throughput, p50/p99 latency, REST calls per operation and memory.
+
+    python -m bench.run --members 1000 --roles 50 --output bench/baseline.json
+    python -m bench.run --members 1000 --roles 50 --compare bench/baseline.json
+
+No Discord connection or token is needed.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import datetime
+import tempfile
+import resource
+
+import discord
+
+from bench.fake_discord import FakeDiscord, SIZE_ROLES
+
+MEMBER_RANGE = (10, 100_000)
+ROLE_RANGE = (10, 250)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark against a fake Discord API.")
+    parser.add_argument("--members", type=int, default=1000, help="members per guild (10-100000)")
+    parser.add_argument("--roles", type=int, default=50, help="roles per guild (10-250)")
+    parser.add_argument("--channels", type=int, default=5, help="text channels per guild")
+    parser.add_argument("--messages", type=int, default=300, help="messages of history per channel")
+    parser.add_argument("--selectors", type=int, default=5, help="role selector messages per channel")
+    parser.add_argument("--iterations", type=int, default=100, help="operations per interactive scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent operations per scenario")
+    parser.add_argument("--latency", type=float, default=30.0, help="simulated REST latency in ms")
+    parser.add_argument("--rate-limit", type=int, default=10, help="requests per bucket per window")
+    parser.add_argument("--rate-window", type=float, default=1.0, help="rate limit window in seconds")
+    parser.add_argument("--scenarios", default="all", help="comma-separated scenario names")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="compare against a previous JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if not MEMBER_RANGE[0] <= args.members <= MEMBER_RANGE[1]:
+        parser.error(f"--members must be between {MEMBER_RANGE[0]} and {MEMBER_RANGE[1]}")
+    if not ROLE_RANGE[0] <= args.roles <= ROLE_RANGE[1]:
+        parser.error(f"--roles must be between {ROLE_RANGE[0]} and {ROLE_RANGE[1]}")
+    return args
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.fake = FakeDiscord(latency=args.latency / 1000, jitter=args.latency / 4000,
+                                rate_limit=args.rate_limit, rate_window=args.rate_window, seed=args.seed)
+        self.bot = None
+        self.guild = None
+        self.fake_guild = None
+        self.main = None
+
+    # --- Setup ---
+    async def start(self):
+        workdir = tempfile.mkdtemp(prefix="demise-bench-")
+        os.environ["DISCORD_TOKEN"] = "bench"
+        os.environ["DEMISE_DB_PATH"] = os.path.join(workdir, "bench.db")
+        os.environ["DEMISE_SYNC_CACHE"] = os.path.join(workdir, "sync_cache.json")
+        os.environ.pop("DEMISE_PERF_TRACE", None)
+        # Measure the handlers themselves, not the RP action throttle.
+        for scope in ("USER", "GUILD", "COMMAND"):
+            os.environ[f"DEMISE_THROTTLE_{scope}"] = "1000000/1"
+        logging.getLogger("discord").addHandler(logging.NullHandler())
+
+        started = time.perf_counter()
+        self.fake_guild = self.fake.add_guild(
+            members=self.args.members, roles=self.args.roles, channels=self.args.channels,
+            messages_per_channel=self.args.messages, selectors_per_channel=self.args.selectors, seed=self.args.seed,
+        )
+        discord.http.Route.BASE = await self.fake.start()
+
+        import main  # imported late so the env above is in place
+        self.main = main
+        self.bot = main.create_bot()
+        self.fake.on_event = lambda name, data: self.bot._connection.parsers[name](data)
+        await main.load_extensions(self.bot)
+        await self.bot.login("bench")
+        self.guild = self.bot._connection._add_guild_from_data(self.fake_guild.gateway_payload())
+        self.bot._ready.set()
+        print(f"🏗️  Seeded {self.args.members} members / {len(self.fake_guild.roles)} roles "
+              f"in {time.perf_counter() - started:.2f}s (RSS {rss_mb():.0f} MB)")
+
+    async def stop(self):
+        await self.bot.close()
+        await self.fake.stop()
+
+    # --- Interaction payloads ---
+    def _base_payload(self, interaction_type, actor_id, data, channel_id=None):
+        g = self.fake_guild
+        channel_id = channel_id or next(iter(g.channels))
+        interaction_id = self.fake.ids.now()
+        return {
+            "id": str(interaction_id), "application_id": str(self.fake.application_id), "type": interaction_type,
+            "token": f"token-{interaction_id}", "version": 1, "guild_id": str(g.id),
+            "channel_id": str(channel_id), "channel": g.channels[channel_id],
+            "member": g.member_payload(actor_id, with_permissions=True), "locale": "en-US",
+            "guild_locale": "en-US", "app_permissions": "8", "entitlements": [], "context": 0,
+            "authorizing_integration_owners": {"0": str(g.id)}, "attachment_size_limit": 8 * 2**20,
+            "data": data,
+        }
+
+    def command(self, name, actor_id, options=(), members=(), channel_id=None):
+        payload = self.command_payload(name, actor_id, options, members, channel_id)
+        return discord.Interaction(data=payload, state=self.bot._connection)
+
+    def command_payload(self, name, actor_id, options=(), members=(), channel_id=None):
+        g = self.fake_guild
+        data = {"id": str(self.fake.ids.now()), "name": name, "type": 1,
+                "options": [{"name": n, "type": t, "value": v} for n, t, v in options]}
+        if members:
+            data["resolved"] = {
+                "users": {str(m): g.members[m]["user"] for m in members},
+                "members": {str(m): {k: v for k, v in g.member_payload(m, True).items() if k != "user"}
+                            for m in members},
+            }
+        return self._base_payload(2, actor_id, data, channel_id)
+
+    def component(self, custom_id, values, actor_id):
+        data = {"custom_id": custom_id, "component_type": 3, "values": [str(v) for v in values]}
+        payload = self._base_payload(3, actor_id, data)
+        return discord.Interaction(data=payload, state=self.bot._connection), data
+
+    # --- Helpers ---
+    def step_pairs(self):
+        by_rank = self.members_by_size()
+        pairs = []
+        for _ in range(self.args.iterations):
+            actor_rank = self.rng.randint(1, len(SIZE_ROLES) - 1)
+            target_rank = self.rng.randint(0, actor_rank - 1)
+            if by_rank[actor_rank] and by_rank[target_rank]:
+                pairs.append((self.rng.choice(by_rank[actor_rank]), self.rng.choice(by_rank[target_rank])))
+        return pairs
+
+    def members_by_size(self):
+        g = self.fake_guild
+        ranks = {g.role_by_name[s]: i for i, s in enumerate(SIZE_ROLES)}
+        by_rank = {i: [] for i in range(len(SIZE_ROLES))}
+        for member_id, member in g.members.items():
+            held = [ranks[int(r)] for r in member["roles"] if int(r) in ranks]
+            if held:
+                by_rank[min(held)].append(member_id)
+        return by_rank
+
+    async def wait_followup(self, token, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while token not in self.fake.followups:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no follow-up for {token}")
+            await asyncio.sleep(0.002)
+        return self.fake.followups[token]
+
+    async def measure(self, name, count, operation, concurrency=None):
+        self.fake.reset_counters()
+        concurrency = concurrency or self.args.concurrency
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+        rss_before = rss_mb()
+
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await operation(i)
+                except Exception as e:
+                    errors += 1
+                    print(f"⚠️  {name}[{i}] failed: {e!r}")
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        elapsed = time.perf_counter() - started
+
+        rest_calls = sum(self.fake.calls.values())
+        result = {
+            "ops": count,
+            "errors": errors,
+            "seconds": round(elapsed, 4),
+            "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "rest_calls": rest_calls,
+            "rest_per_op": round(rest_calls / count, 3) if count else 0.0,
+            "ratelimited": sum(self.fake.ratelimited.values()),
+            "routes": dict(sorted(self.fake.calls.items())),
+            "rss_mb": round(rss_mb(), 1),
+            "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        }
+        print(f"  {name:<28}{count:>6} ops {result['throughput']:>9.1f}/s  p50 {result['p50_ms']:>8.1f}ms  "
+              f"p99 {result['p99_ms']:>8.1f}ms  rest/op {result['rest_per_op']:>6.2f}  429s {result['ratelimited']:>4}")
+        return result
+
+    # --- Scenarios ---
+    async def scenario_step(self):
+        pairs = self.step_pairs()
+
+        async def op(i):
+            actor, target = pairs[i]
+            interaction = self.command("step", actor, [("user", 6, str(target))], members=[target])
+            await self.bot.tree._call(interaction)
+
+        return await self.measure("size_interaction (/step)", len(pairs), op)
+
+    async def scenario_change_size(self):
+        g = self.fake_guild
+        targets = [m for m in g.members if m != int(self.fake.bot_user["id"])]
+
+        async def op(i):
+            target = self.rng.choice(targets)
+            size = self.rng.choice(SIZE_ROLES)
+            interaction = self.command("change_size", g.owner_id,
+                                       [("user", 6, str(target)), ("size_role", 3, size)], members=[target])
+            await self.bot.tree._call(interaction)
+
+        return await self.measure("change_size", self.args.iterations, op)
+
+    async def scenario_dropdown(self):
+        from cogs.roles import RoleDropdownView
+
+        g = self.fake_guild
+        role_ids = [int(r["id"]) for r in g.roles.values() if r["name"].startswith("Role ")][:20]
+        roles = [self.guild.get_role(r) for r in role_ids]
+        view = RoleDropdownView(roles, True)
+        select = view.children[0]
+        members = [m for m in g.members if m != int(self.fake.bot_user["id"])]
+        # A few members click repeatedly to exercise per-member coalescing.
+        clickers = [self.rng.choice(members) for _ in range(max(1, self.args.iterations // 3))]
+
+        async def op(i):
+            actor = clickers[i % len(clickers)]
+            values = self.rng.sample(role_ids, self.rng.randint(0, 4))
+            interaction, data = self.component(select.custom_id, values, actor)
+            select._refresh_state(interaction, data)
+            await select.callback(interaction)
+            await self.wait_followup(interaction.token)
+
+        return await self.measure("RoleDropdown.callback", self.args.iterations, op)
+
+    async def scenario_roles_setup(self):
+        owner = self.fake_guild.owner_id
+
+        async def op(i):
+            await self.bot.tree._call(self.command("roles_setup", owner))
+
+        first = await self.measure("roles_setup (first run)", 1, op, concurrency=1)
+        steady = await self.measure("roles_setup (configured)", 5, op, concurrency=1)
+        return {"first": first, "configured": steady}
+
+    async def scenario_persistent_views(self):
+        from cogs.roles import setup_persistent_views
+
+        async def op(i):
+            await setup_persistent_views(self.bot)
+
+        migration = await self.measure("setup_persistent_views (migrate)", 1, op, concurrency=1)
+        restore = await self.measure("setup_persistent_views (restore)", 1, op, concurrency=1)
+        return {"migrate": migration, "restore": restore}
+
+    async def scenario_cleanup(self):
+        owner = self.fake_guild.owner_id
+        channels = list(self.fake_guild.channels)
+
+        async def op(i):
+            interaction = self.command("cleanup", owner, [("depth", 4, 0)], channel_id=channels[i])
+            await self.bot.tree._call(interaction)
+            await self.wait_followup(interaction.token)
+
+        return await self.measure("/cleanup", len(channels), op, concurrency=1)
+
+    async def scenario_http_interactions(self):
+        """/step delivered as signed webhook requests, answered inline, with no gateway guild cache."""
+        from aiohttp import ClientSession, web
+        from nacl.signing import SigningKey
+        from cogs.http_interactions import InteractionsEndpoint, INTERACTIONS_PATH
+
+        key = SigningKey.generate()
+        endpoint = InteractionsEndpoint(self.bot, key.verify_key.encode().hex())
+        endpoint.activate()
+        app = web.Application()
+        app.router.add_post(INTERACTIONS_PATH, endpoint.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}{INTERACTIONS_PATH}"
+
+        pairs = self.step_pairs()
+        self.bot._connection._remove_guild(self.guild)  # stateless worker: roles come from a REST snapshot
+
+        # The inline reply returns before the handler's death-path edit, so an
+        # op also waits for its handler task to finish.
+        handlers = {}  # interaction id -> future resolved when the handler returns
+        running = set()  # handler tasks, drained before the fake server stops
+        tree_call = self.bot.tree._call
+
+        async def tracked_call(interaction):
+            running.add(asyncio.current_task())
+            try:
+                await tree_call(interaction)
+            finally:
+                running.discard(asyncio.current_task())
+                future = handlers.pop(interaction.id, None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+        self.bot.tree._call = tracked_call
+
+        async def op(i):
+            actor, target = pairs[i]
+            payload = self.command_payload("step", actor, [("user", 6, str(target))], members=[target])
+            interaction_id = int(payload["id"])
+            handled = handlers[interaction_id] = asyncio.get_running_loop().create_future()
+            body = json.dumps(payload).encode()
+            timestamp = str(int(time.time()))
+            headers = {
+                "Content-Type": "application/json",
+                "X-Signature-Ed25519": key.sign(timestamp.encode() + body).signature.hex(),
+                "X-Signature-Timestamp": timestamp,
+            }
+            try:
+                async with session.post(url, data=body, headers=headers) as resp:
+                    reply = await resp.json()
+                    if resp.status != 200 or reply.get("type") != 4:
+                        raise RuntimeError(f"unexpected reply {resp.status}: {reply}")
+                await asyncio.wait_for(handled, 60.0)
+            finally:
+                handlers.pop(interaction_id, None)
+
+        async with ClientSession() as session:
+            try:
+                return await self.measure("HTTP interactions (/step)", len(pairs), op)
+            finally:
+                # Failed ops can leave handlers running; drain them before the fake stops.
+                if running:
+                    await asyncio.wait(list(running), timeout=60.0)
+                del self.bot.tree._call
+                await runner.cleanup()
+
+    SCENARIOS = ("step", "change_size", "dropdown", "roles_setup", "persistent_views", "cleanup", "http_interactions")
+
+    async def run(self):
+        wanted = self.SCENARIOS if self.args.scenarios == "all" else self.args.scenarios.split(",")
+        results = {}
+        for name in self.SCENARIOS:
+            if name in wanted:
+                result = await getattr(self, f"scenario_{name}")()
+                if "ops" in result:
+                    results[name] = result
+                else:
+                    for phase, phase_result in result.items():
+                        results[f"{name}.{phase}"] = phase_result
+        return results
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance) and current["p99_ms"] - previous["p99_ms"] > 5:
+            regressions.append(f"{name}: p99 {previous['p99_ms']}ms -> {current['p99_ms']}ms")
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput']}/s -> {current['throughput']}/s")
+        if current["rest_per_op"] > previous["rest_per_op"] + 0.01:
+            regressions.append(f"{name}: REST calls/op {previous['rest_per_op']} -> {current['rest_per_op']}")
+    return regressions
+
+
+async def amain(args):
+    harness = Harness(args)
+    await harness.start()
+    try:
+        results = await harness.run()
+    finally:
+        await harness.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "discord.py": discord.__version__,
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  • {line}")
+            return 1
+        print("✅ No regressions against baseline.")
+    return 0
+
+
+def main(argv=None):
+    sys.exit(asyncio.run(amain(parse_args(argv))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import os
+import time
+import asyncio
+import traceback
+from dataclasses import dataclass
+
+import discord
+
+from cogs.storage import db
+from cogs.metrics import Metric, metrics
+from cogs.member_cache import member_cache
+from cogs.role_ops import mutate_roles, target_roles
+from cogs.rp_events import rp_log
+from cogs.rest_scheduler import rest_priority, BACKGROUND
+
+# ---------------- CONFIG ----------------
+BULK_CONCURRENCY = int(os.getenv("DEMISE_BULK_CONCURRENCY", 2))  # member edits in flight per job
+PROGRESS_INTERVAL = 2.0  # seconds between progress edits / checkpoints
+TOKEN_LIFETIME = 14 * 60  # interaction follow-ups stop working after 15 minutes
+# ----------------------------------------
+
+NO_MENTIONS = discord.AllowedMentions.none()  # job messages are public; labels must never ping
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    job_id          INTEGER PRIMARY KEY,
+    guild_id        INTEGER NOT NULL,
+    channel_id      INTEGER NOT NULL,
+    user_id         INTEGER NOT NULL,
+    label           TEXT    NOT NULL,
+    scope_role_id   INTEGER NOT NULL,
+    add_role_ids    TEXT    NOT NULL,
+    remove_role_ids TEXT    NOT NULL,
+    status          TEXT    NOT NULL,
+    cursor          INTEGER NOT NULL DEFAULT 0,
+    done            INTEGER NOT NULL DEFAULT 0,
+    failed          INTEGER NOT NULL DEFAULT 0,
+    updated_at      REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bulk_jobs_status ON bulk_jobs (status);
+"""
+
+
+def _ids(text):
+    return tuple(int(r) for r in text.split(",") if r)
+
+
+@dataclass
+class BulkJob:
+    """A role change applied to every member holding `scope_role_id`.
+
+    Members are processed in ID order and `cursor` is the last ID handled,
+    so an interrupted job picks up where it stopped. Re-applying a member is
+    harmless because unchanged members are skipped without a REST call.
+    """
+    job_id: int
+    guild_id: int
+    channel_id: int
+    user_id: int
+    label: str
+    scope_role_id: int
+    add_role_ids: tuple
+    remove_role_ids: tuple
+    status: str = "running"
+    cursor: int = 0
+    done: int = 0
+    failed: int = 0
+    total: int = 0
+
+
+class CancelButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bulk_cancel:(?P<job_id>\d+)"):
+    """Cancel button on a job's progress message; survives restarts via its custom ID."""
+
+    def __init__(self, job_id: int):
+        super().__init__(discord.ui.Button(
+            label="Cancel", style=discord.ButtonStyle.danger, custom_id=f"bulk_cancel:{job_id}",
+        ))
+        self.job_id = job_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["job_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        if not bulk_jobs.can_manage(interaction.user):
+            await interaction.response.send_message("❌ You can't cancel this job.", ephemeral=True)
+            return
+        if bulk_jobs.cancel(self.job_id):
+            await interaction.response.send_message("🛑 Cancelling…", ephemeral=True)
+        else:
+            await interaction.response.send_message("ℹ️ That job is no longer running.", ephemeral=True)
+
+
+def _cancel_view(job_id: int):
+    view = discord.ui.View(timeout=None)
+    view.add_item(CancelButton(job_id))
+    return view
+
+
+class _Progress:
+    """Progress message for a job: the interaction follow-up while its token is
+    valid, then a regular channel message."""
+
+    def __init__(self, channel, message=None):
+        self.channel = channel
+        self.message = message
+        self.expires_at = time.monotonic() + TOKEN_LIFETIME if message is not None else 0.0
+
+    async def update(self, content: str, view=None):
+        try:
+            if self.message is not None and (self.expires_at == 0.0 or time.monotonic() < self.expires_at):
+                await self.message.edit(content=content, view=view, allowed_mentions=NO_MENTIONS)
+                return
+            self.message = await self.channel.send(content, view=view, allowed_mentions=NO_MENTIONS)
+            self.expires_at = 0.0  # channel messages don't expire
+        except discord.HTTPException:
+            print(f"⚠️ Could not update bulk job progress:\n{traceback.format_exc()}")
+
+
+class BulkJobRunner:
+    """Runs mass role changes in the background, one job per guild.
+
+    Progress is checkpointed to SQLite, so jobs interrupted by a restart are
+    resumed on the next ready. Member edits run at background REST priority
+    with a small concurrency, leaving room for interactive commands.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+        self.db.register_schema(SCHEMA)
+        self.bot = None
+        self.can_manage = lambda member: False
+        self.size_order = ()
+        self.dead_role = None
+        self._jobs = {}  # guild_id -> BulkJob
+        self._tasks = {}  # guild_id -> asyncio.Task
+        self._cancelled = set()
+        self._resumed = False
+        self.updated = 0
+        self.failed = 0
+
+    def attach(self, bot, can_manage, size_order=(), dead_role=None):
+        """`size_order` and `dead_role` name the roles whose changes are logged as RP events."""
+        self.bot = bot
+        self.can_manage = can_manage
+        self.size_order = size_order
+        self.dead_role = dead_role
+        bot.add_dynamic_items(CancelButton)
+        bot.add_listener(self.on_ready, "on_ready")
+        metrics.register(self.collect)
+
+    def running(self, guild_id: int):
+        return self._jobs.get(guild_id)
+
+    def cancel(self, job_id: int) -> bool:
+        if not any(job.job_id == job_id for job in self._jobs.values()):
+            return False
+        self._cancelled.add(job_id)
+        return True
+
+    # --- Persistence ---
+    async def _save(self, job: BulkJob):
+        await self.db.execute(
+            "INSERT OR REPLACE INTO bulk_jobs (job_id, guild_id, channel_id, user_id, label, scope_role_id, "
+            "add_role_ids, remove_role_ids, status, cursor, done, failed, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.guild_id, job.channel_id, job.user_id, job.label, job.scope_role_id,
+             ",".join(map(str, job.add_role_ids)), ",".join(map(str, job.remove_role_ids)),
+             job.status, job.cursor, job.done, job.failed, time.time()),
+        )
+
+    async def _unfinished(self):
+        rows = await self.db.fetchall(
+            "SELECT job_id, guild_id, channel_id, user_id, label, scope_role_id, add_role_ids, remove_role_ids, "
+            "status, cursor, done, failed FROM bulk_jobs WHERE status = 'running'"
+        )
+        return [
+            BulkJob(row[0], row[1], row[2], row[3], row[4], row[5], _ids(row[6]), _ids(row[7]), *row[8:])
+            for row in rows
+        ]
+
+    # --- Lifecycle ---
+    async def start(self, interaction: discord.Interaction, label: str, scope: discord.Role, *, add=(), remove=()):
+        """Start a job from a deferred interaction. Returns False if the guild already has one running."""
+        guild = interaction.guild
+        if guild.id in self._jobs:
+            return False
+
+        job = BulkJob(
+            job_id=interaction.id, guild_id=guild.id, channel_id=interaction.channel_id, user_id=interaction.user.id,
+            label=label, scope_role_id=scope.id,
+            add_role_ids=tuple(r.id for r in add if r), remove_role_ids=tuple(r.id for r in remove if r),
+        )
+        self._jobs[guild.id] = job
+        try:
+            await self._save(job)
+            message = await interaction.followup.send(f"⏳ {label}: collecting members…", view=_cancel_view(job.job_id),
+                                                      wait=True, allowed_mentions=NO_MENTIONS)
+        except Exception:
+            self._jobs.pop(guild.id, None)
+            raise
+        self._spawn(job, _Progress(interaction.channel, message))
+        return True
+
+    def _spawn(self, job: BulkJob, progress: _Progress):
+        self._jobs[job.guild_id] = job
+        with rest_priority(BACKGROUND):
+            task = asyncio.get_running_loop().create_task(self._guarded_run(job, progress))
+        self._tasks[job.guild_id] = task
+        task.add_done_callback(lambda _: self._finished(job))
+
+    def _finished(self, job: BulkJob):
+        self._jobs.pop(job.guild_id, None)
+        self._tasks.pop(job.guild_id, None)
+        self._cancelled.discard(job.job_id)
+
+    async def on_ready(self):
+        if self._resumed:
+            return
+        self._resumed = True
+        for job in await self._unfinished():
+            guild = self.bot.get_guild(job.guild_id)
+            if guild is None or job.guild_id in self._jobs:
+                continue  # another cluster owns it, or the guild is gone
+            channel = guild.get_channel(job.channel_id)
+            if channel is None:
+                job.status = "failed"
+                await self._save(job)
+                continue
+            print(f"♻️ Resuming bulk job {job.job_id} ({job.label}) in guild {guild.id} from member {job.cursor}")
+            self._spawn(job, _Progress(channel))
+
+    # --- Worker ---
+    def _status_line(self, job: BulkJob, prefix: str) -> str:
+        line = f"{prefix} {job.label}: {job.done}/{job.total} members updated"
+        if job.failed:
+            line += f", {job.failed} failed"
+        return line
+
+    async def _targets(self, job: BulkJob, guild: discord.Guild, add, remove):
+        scope = guild.get_role(job.scope_role_id)
+        if scope is None:
+            return None
+        targets = []
+        async for member in member_cache.members_with_role(guild, scope):
+            if member.id > job.cursor and target_roles(member, add, remove) is not None:
+                targets.append(member)
+        targets.sort(key=lambda m: m.id)
+        return targets
+
+    async def _guarded_run(self, job: BulkJob, progress: _Progress):
+        try:
+            await self._run(job, progress)
+        except Exception:
+            print(f"❌ Bulk job {job.job_id} failed:\n{traceback.format_exc()}")
+            job.status = "failed"
+            await self._save(job)
+            await progress.update(self._status_line(job, "❌ Failed —"), view=None)
+
+    async def _run(self, job: BulkJob, progress: _Progress):
+        guild = self.bot.get_guild(job.guild_id)
+        add = [guild.get_role(r) for r in job.add_role_ids]
+        remove = [guild.get_role(r) for r in job.remove_role_ids]
+        reason = f"{job.label} (job {job.job_id})"
+
+        targets = await self._targets(job, guild, add, remove)
+        if targets is None:
+            job.status = "failed"
+            await self._save(job)
+            await progress.update(f"❌ {job.label}: the target role no longer exists.")
+            return
+        job.total = job.done + job.failed + len(targets)
+
+        # Fold the job's revives and size changes into the RP log like the single-member commands.
+        revives = any(r is not None and r.name == self.dead_role for r in remove)
+        changes_size = any(r is not None and r.name in self.size_order for r in (*add, *remove))
+        new_size = next((r.name for r in add if r is not None and r.name in self.size_order), None)
+
+        async def apply(member):
+            try:
+                await mutate_roles(member, add=add, remove=remove, reason=reason)
+                job.done += 1
+                self.updated += 1
+            except discord.HTTPException:
+                job.failed += 1
+                self.failed += 1
+                return
+            if revives:
+                await rp_log.record(job.guild_id, job.user_id, "revive", target_id=member.id)
+            if changes_size:
+                await rp_log.record(job.guild_id, job.user_id, "change_size", target_id=member.id,
+                                    detail=new_size, sizes={member.id: new_size})
+
+        last_report = 0.0
+        for i in range(0, len(targets), BULK_CONCURRENCY):
+            if job.job_id in self._cancelled:
+                job.status = "cancelled"
+                break
+            batch = targets[i:i + BULK_CONCURRENCY]
+            await asyncio.gather(*(apply(m) for m in batch))
+            job.cursor = batch[-1].id
+
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                await self._save(job)
+                await progress.update(self._status_line(job, "⏳"), view=_cancel_view(job.job_id))
+        else:
+            job.status = "done"
+
+        await self._save(job)
+        prefix = "🛑 Cancelled —" if job.status == "cancelled" else "✅"
+        await progress.update(self._status_line(job, prefix), view=None)
+
+    def collect(self):
+        yield Metric("demise_bulk_jobs_running", "gauge", "Mass role jobs currently running.").add(len(self._jobs))
+        yield Metric("demise_bulk_members_updated_total", "counter", "Members updated by mass role jobs.").add(
+            self.updated)
+        yield Metric("demise_bulk_members_failed_total", "counter", "Member updates that failed in mass role jobs.").add(
+            self.failed)
+
+
+bulk_jobs = BulkJobRunner()
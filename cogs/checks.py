@@ -0,0 +1,9 @@
+import discord
+from discord import app_commands
+
+
+def is_bot_owner():
+    """App command check that only passes for the bot's owner (or team members)."""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        return await interaction.client.is_owner(interaction.user)
+    return app_commands.check(predicate)
@@ -1,58 +1,72 @@
 import discord
 from discord import app_commands
 
+from cogs.checks import is_bot_owner
+from cogs.role_provision import RoleSpec, plan_setup, plan_remove, apply_plan
+from cogs.sync import DEV_GUILD_ID
+from cogs.hot_reload import command_module
+
 def register(bot: discord.Client, helpers: dict):
     has_role = helpers["has_role"]
-    SIZE_ORDER = helpers["SIZE_ORDER"]
+    get_role = helpers["get_role"]
     SPELLCASTER_ROLE = helpers["SPELLCASTER_ROLE"]
     DEAD_ROLE = helpers["DEAD_ROLE"]
     OWNER_ROLE = helpers["OWNER_ROLE"]
+    response_cache = helpers["response_cache"]
+
+    # Bottom to top: applied as one contiguous block, Spellcaster highest.
+    ROLE_SPECS = [
+        RoleSpec("Tiny", discord.Colour.yellow()),
+        RoleSpec("Normal", discord.Colour.green()),
+        RoleSpec("Giant", discord.Colour.blue()),
+        RoleSpec("Giantess", discord.Colour.purple()),
+        RoleSpec(DEAD_ROLE, discord.Colour.from_rgb(0, 0, 0)),
+        RoleSpec(SPELLCASTER_ROLE, discord.Colour(0x9b59b6)),
+    ]
+
+    async def run_plan(interaction: discord.Interaction, plan, dry_run: bool, done: str):
+        if dry_run or plan.empty:
+            prefix = "🧪 **Dry run**\n" if dry_run else ""
+            await interaction.response.send_message(prefix + plan.describe(), ephemeral=dry_run)
+            return
+
+        await interaction.response.defer(thinking=True)
+        try:
+            await apply_plan(plan, get_role, reason=f"{interaction.command.name} by {interaction.user}")
+        except discord.HTTPException as e:
+            await interaction.followup.send(f"❌ Failed to apply role changes: {e.text or e}\n{plan.describe()}")
+            return
+        await interaction.followup.send(f"{done}\n{plan.describe()}")
 
     # --- Roles Setup ---
     @bot.tree.command(name="roles_setup", description="Creates or updates all default roles for the RP system (Owner only).")
-    async def roles_setup(interaction: discord.Interaction):
+    @app_commands.describe(dry_run="Only show what would change")
+    async def roles_setup(interaction: discord.Interaction, dry_run: bool = False):
         if not has_role(interaction.user, OWNER_ROLE):
             await interaction.response.send_message("❌ Only users with the @Owner role can do that.", ephemeral=True)
             return
 
-        guild = interaction.guild
-        existing_roles = {role.name: role for role in guild.roles}
-        created = []
-
-        ROLE_ORDER = [
-            ("Tiny", discord.Colour.yellow()),
-            ("Normal", discord.Colour.green()),
-            ("Giant", discord.Colour.blue()),
-            ("Giantess", discord.Colour.purple()),
-            ("Dead", discord.Colour.from_rgb(0, 0, 0)),
-            (SPELLCASTER_ROLE, discord.Colour(0x9b59b6)),
-        ]
-
-        for role_name, colour in ROLE_ORDER:
-            if role_name in existing_roles:
-                await existing_roles[role_name].edit(colour=colour)
-            else:
-                role = await guild.create_role(name=role_name, colour=colour)
-                created.append(role_name)
-
-        msg = "✅ Roles created: " + ", ".join(created) if created else "ℹ️ All roles updated successfully."
-        await interaction.response.send_message(msg)
+        plan = plan_setup(interaction.guild, ROLE_SPECS, get_role)
+        await run_plan(interaction, plan, dry_run, "✅ Roles set up.")
 
     # --- Roles Remove ---
     @bot.tree.command(name="roles_remove", description="Removes all roles created by the bot (Owner only).")
-    async def roles_remove(interaction: discord.Interaction):
+    @app_commands.describe(dry_run="Only show what would change")
+    async def roles_remove(interaction: discord.Interaction, dry_run: bool = False):
         if not has_role(interaction.user, OWNER_ROLE):
             await interaction.response.send_message("❌ Only users with the @Owner role can do that.", ephemeral=True)
             return
 
-        guild = interaction.guild
-        removed = []
+        plan = plan_remove(interaction.guild, [spec.name for spec in ROLE_SPECS], get_role)
+        await run_plan(interaction, plan, dry_run, "🗑️ Roles removed.")
+
+    # --- Response Cache ---
+    @bot.tree.command(name="cache_clear", description="Drop cached application info and derived embeds (Bot owner only).",
+                      guild=discord.Object(id=DEV_GUILD_ID))
+    @is_bot_owner()
+    async def cache_clear(interaction: discord.Interaction):
+        response_cache.invalidate()
+        await interaction.response.send_message("🧽 Response cache cleared.", ephemeral=True)
 
-        for role_name in SIZE_ORDER + [DEAD_ROLE, SPELLCASTER_ROLE]:
-            role = discord.utils.get(guild.roles, name=role_name)
-            if role:
-                await role.delete()
-                removed.append(role_name)
 
-        msg = f"🗑️ Removed roles: {', '.join(removed)}" if removed else "ℹ️ No roles to remove."
-        await interaction.response.send_message(msg)
\ No newline at end of file
+setup, teardown = command_module(register)
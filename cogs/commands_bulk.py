@@ -0,0 +1,86 @@
+import discord
+from discord import app_commands
+
+from cogs.bulk_jobs import bulk_jobs
+from cogs.hot_reload import command_module
+
+def register(bot: discord.Client, helpers: dict):
+    get_role = helpers["get_role"]
+    is_rp_manager = helpers["is_rp_manager"]
+    SIZE_ORDER = helpers["SIZE_ORDER"]
+    DEAD_ROLE = helpers["DEAD_ROLE"]
+
+    def already_running(running) -> str:
+        label = running.label if running else "Another mass role change"
+        return f"⏳ **{label}** is already running here. Use `/bulk_cancel` to stop it first."
+
+    async def start_job(interaction: discord.Interaction, label: str, scope, add=(), remove=()):
+        # Check before deferring: the deferred reply is public, so an ephemeral notice must come first.
+        running = bulk_jobs.running(interaction.guild.id)
+        if running is not None:
+            await interaction.response.send_message(already_running(running), ephemeral=True)
+            return
+
+        await interaction.response.defer(thinking=True)
+        if not await bulk_jobs.start(interaction, label, scope, add=add, remove=remove):
+            # Another job started while deferring; answer in the deferred message.
+            await interaction.followup.send(already_running(bulk_jobs.running(interaction.guild.id)),
+                                            allowed_mentions=discord.AllowedMentions.none())
+
+    # --- Mass Revive ---
+    @bot.tree.command(name="revive_all", description="Revive everyone who is dead (Spellcaster/Owner only).")
+    async def revive_all(interaction: discord.Interaction):
+        if not is_rp_manager(interaction.user):
+            await interaction.response.send_message("❌ Only Spellcasters or Owners can do that!", ephemeral=True)
+            return
+
+        dead = get_role(interaction.guild, DEAD_ROLE)
+        if dead is None:
+            await interaction.response.send_message(f"⚠️ There is no @{DEAD_ROLE} role here.", ephemeral=True)
+            return
+
+        await start_job(interaction, "Mass revive", dead, remove=[dead])
+
+    # --- Mass Size Change ---
+    @bot.tree.command(name="size_all", description="Set or clear the size role of a whole role or everyone (Spellcaster/Owner only).")
+    @app_commands.describe(
+        size_role="Size to give everyone, or Clear to remove size roles",
+        role="Only change members with this role (default: everyone)",
+    )
+    @app_commands.choices(size_role=[app_commands.Choice(name=s, value=s) for s in SIZE_ORDER]
+                          + [app_commands.Choice(name="Clear", value="clear")])
+    async def size_all(interaction: discord.Interaction, size_role: str, role: discord.Role = None):
+        if not is_rp_manager(interaction.user):
+            await interaction.response.send_message("❌ Only Spellcasters or Owners can do that!", ephemeral=True)
+            return
+
+        guild = interaction.guild
+        size_roles = [get_role(guild, r) for r in SIZE_ORDER]
+        scope = role or guild.default_role
+        scope_name = "everyone" if scope.is_default() else scope.name
+        if size_role == "clear":
+            await start_job(interaction, f"Clearing sizes for {scope_name}", scope, remove=size_roles)
+            return
+
+        new_role = get_role(guild, size_role)
+        if new_role is None:
+            await interaction.response.send_message(f"⚠️ There is no @{size_role} role here.", ephemeral=True)
+            return
+
+        await start_job(interaction, f"Making {scope_name} {size_role} sized", scope, add=[new_role], remove=size_roles)
+
+    # --- Cancel ---
+    @bot.tree.command(name="bulk_cancel", description="Stop the mass role change running in this server.")
+    async def bulk_cancel(interaction: discord.Interaction):
+        if not is_rp_manager(interaction.user):
+            await interaction.response.send_message("❌ Only Spellcasters or Owners can do that!", ephemeral=True)
+            return
+
+        running = bulk_jobs.running(interaction.guild.id)
+        if running is None or not bulk_jobs.cancel(running.job_id):
+            await interaction.response.send_message("ℹ️ Nothing is running.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"🛑 Cancelling **{running.label}**…", ephemeral=True)
+
+
+setup, teardown = command_module(register)
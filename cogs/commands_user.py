@@ -1,9 +1,19 @@
+import time
+
 import discord
 from discord import app_commands
 
+from cogs.rp_events import CATEGORIES as RP_CATEGORIES
+from cogs.hot_reload import command_module
+
 def register(bot: discord.Client, helpers: dict):
     get_size_rank = helpers["get_size_rank"]
     has_role = helpers["has_role"]
+    get_role = helpers["get_role"]
+    mutate_roles = helpers["mutate_roles"]
+    response_cache = helpers["response_cache"]
+    throttle = helpers["throttle"]
+    rp_log = helpers["rp_log"]
     SIZE_ORDER = helpers["SIZE_ORDER"]
     SPELLCASTER_ROLE = helpers["SPELLCASTER_ROLE"]
     DEAD_ROLE = helpers["DEAD_ROLE"]
@@ -26,6 +36,14 @@ def register(bot: discord.Client, helpers: dict):
         causes_death: bool = False, 
         emoji: str = "💥"
     ):
+        # Checked before anything else so a throttled call costs a single ephemeral reply.
+        retry_after = throttle.check(interaction.user.id, interaction.guild_id, interaction.command.name)
+        if retry_after:
+            await interaction.response.send_message(
+                f"⏳ Slow down! You can do that again in {retry_after:.1f}s.", ephemeral=True
+            )
+            return
+
         if interaction.user.id == user.id:
             await interaction.response.send_message("😒 You can’t target yourself, silly.", ephemeral=True)
             return
@@ -37,17 +55,24 @@ def register(bot: discord.Client, helpers: dict):
             await interaction.response.send_message("❌ Both users must have size roles first.", ephemeral=True)
             return
 
-        if actor_rank > target_rank:
+        success = actor_rank > target_rank
+        killed = False
+        if success:
             await interaction.response.send_message(f"{emoji} {interaction.user.mention} {success_verb} {user.mention}!")
             if causes_death:
-                dead_role = discord.utils.get(interaction.guild.roles, name=DEAD_ROLE)
-                if dead_role:
-                    await user.add_roles(dead_role)
+                # Only a member who wasn't already Dead counts as a kill.
+                killed = bool(await mutate_roles(user, add=[get_role(interaction.guild, DEAD_ROLE)]))
         else:
             await interaction.response.send_message(
                 f"😬 {interaction.user.mention} tried to {action_word} {user.mention}... embarrassing."
             )
 
+        await rp_log.record(
+            interaction.guild_id, interaction.user.id, interaction.command.name, target_id=user.id,
+            success=success, detail="death" if killed else None,
+            sizes={interaction.user.id: SIZE_ORDER[actor_rank], user.id: SIZE_ORDER[target_rank]},
+        )
+
     # --- Giant Commands ---
     @bot.tree.command(name="step", description="Step on a smaller user.")
     async def step(interaction: discord.Interaction, user: discord.Member):
@@ -76,10 +101,11 @@ def register(bot: discord.Client, helpers: dict):
             await interaction.response.send_message("❌ Only Spellcasters can revive!", ephemeral=True)
             return
 
-        dead_role = discord.utils.get(interaction.guild.roles, name=DEAD_ROLE)
-        if dead_role:
-            await user.remove_roles(dead_role)
+        revived = await mutate_roles(user, remove=[get_role(interaction.guild, DEAD_ROLE)])
         await interaction.response.send_message(f"💫 {user.mention} has been revived!")
+        # Reviving a living member is logged but doesn't count as a revive.
+        await rp_log.record(interaction.guild_id, interaction.user.id, "revive", target_id=user.id,
+                            success=bool(revived))
 
     @bot.tree.command(name="change_size", description="Change a user's size role (Spellcaster only).")
     async def change_size(interaction: discord.Interaction, user: discord.Member, size_role: str):
@@ -91,72 +117,136 @@ def register(bot: discord.Client, helpers: dict):
             await interaction.response.send_message("⚠️ Invalid size role.", ephemeral=True)
             return
 
-        for r in SIZE_ORDER:
-            role = discord.utils.get(interaction.guild.roles, name=r)
-            if role:
-                await user.remove_roles(role)
-
-        new_role = discord.utils.get(interaction.guild.roles, name=size_role)
-        if new_role:
-            await user.add_roles(new_role)
+        size_roles = [get_role(interaction.guild, r) for r in SIZE_ORDER]
+        new_role = get_role(interaction.guild, size_role)
+        await mutate_roles(user, add=[new_role], remove=size_roles)
         await interaction.response.send_message(f"✨ {user.mention} is now {size_role} sized!")
+        await rp_log.record(interaction.guild_id, interaction.user.id, "change_size", target_id=user.id,
+                            detail=size_role, sizes={user.id: size_role})
+
+    # --- Stats ---
+    def format_duration(seconds: float) -> str:
+        minutes, _ = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        days, hours = divmod(hours, 24)
+        if days:
+            return f"{days}d {hours}h"
+        if hours:
+            return f"{hours}h {minutes}m"
+        return f"{minutes}m"
+
+    @bot.tree.command(name="stats", description="Show a user's RP stats.")
+    async def stats(interaction: discord.Interaction, user: discord.Member = None):
+        user = user or interaction.user
+        record = await rp_log.stats(interaction.guild_id, user.id)
+        if record is None:
+            await interaction.response.send_message(f"📭 {user.display_name} hasn't done anything yet.", ephemeral=True)
+            return
 
-    # --- Info (Embed with Columns) ---
-    @bot.tree.command(name="info", description="List all available commands.")
-    async def info(interaction: discord.Interaction):
-        embed = discord.Embed(
-            title="📘 Demise Command List",
-            description="Your guide to all available powers.",
-            colour=discord.Colour.purple()
-        )
-
-        # Column-style fields
-        embed.add_field(
-            name="👑 For Larger People",
-            value=(
-                f"🔪 **Dangerous**\n"
-                f"{ACTION_EMOJIS['step']} `/step` — Step on a user.\n"
-                f"{ACTION_EMOJIS['squish']} `/squish` — Squish a user.\n"
-                f"{ACTION_EMOJIS['devour']} `/devour` — Devour a user."
-            ),
-            inline=True
-        )
+        now = time.time()
+        embed = discord.Embed(title=f"📊 {user.display_name}'s Stats", colour=discord.Colour.purple())
+        embed.add_field(name="🔪 Kills", value=str(record.kills), inline=True)
+        embed.add_field(name="💀 Deaths", value=str(record.deaths), inline=True)
+        embed.add_field(name="💫 Revives", value=str(record.revives), inline=True)
+        embed.add_field(name="🎬 Actions", value=str(record.actions), inline=True)
         embed.add_field(
-            name="😋 Fun",
-            value=(
-                f"{ACTION_EMOJIS['poke']} `/poke` — Poke a user.\n"
-                f"{ACTION_EMOJIS['pick_up']} `/pick_up` — Pick up a user."
-            ),
-            inline=True
-        )
-        embed.add_field(
-            name="‎",
-            value="‎",  # spacer to balance columns
-            inline=True
+            name="📏 Time at Size",
+            value="\n".join(f"{size}: {format_duration(record.time_at(size, now))}" for size in SIZE_ORDER),
+            inline=False,
         )
+        await interaction.response.send_message(embed=embed)
+
+    @bot.tree.command(name="leaderboard", description="Show the server's top RP players.")
+    @app_commands.choices(category=[app_commands.Choice(name=c.title(), value=c) for c in RP_CATEGORIES])
+    async def leaderboard(interaction: discord.Interaction, category: str = "kills"):
+        entries = await rp_log.leaderboard(interaction.guild_id, category)
+        if not entries:
+            await interaction.response.send_message("📭 No one is on the board yet.", ephemeral=True)
+            return
 
-        embed.add_field(
-            name="✨ Spellcasters",
-            value=(
-                "💫 `/revive` — Revive a dead user.\n"
-                "🔮 `/change_size` — Change a user's size role."
-            ),
-            inline=False
-        )
+        medals = ["🥇", "🥈", "🥉"]
+        lines = [
+            f"{medals[i] if i < len(medals) else f'`#{i + 1}`'} <@{user_id}> — **{value}**"
+            for i, (value, user_id) in enumerate(entries)
+        ]
+        embed = discord.Embed(title=f"🏆 {category.title()} Leaderboard", description="\n".join(lines),
+                              colour=discord.Colour.gold())
+        await interaction.response.send_message(embed=embed, allowed_mentions=discord.AllowedMentions.none())
 
-        embed.set_footer(text="Thank you for using Demise 💀")
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+    # --- Info (Embed with Columns) ---
+    # Static, so it is built once at registration and reused for every call.
+    info_embed = discord.Embed(
+        title="📘 Demise Command List",
+        description="Your guide to all available powers.",
+        colour=discord.Colour.purple()
+    )
+
+    # Column-style fields
+    info_embed.add_field(
+        name="👑 For Larger People",
+        value=(
+            f"🔪 **Dangerous**\n"
+            f"{ACTION_EMOJIS['step']} `/step` — Step on a user.\n"
+            f"{ACTION_EMOJIS['squish']} `/squish` — Squish a user.\n"
+            f"{ACTION_EMOJIS['devour']} `/devour` — Devour a user."
+        ),
+        inline=True
+    )
+    info_embed.add_field(
+        name="😋 Fun",
+        value=(
+            f"{ACTION_EMOJIS['poke']} `/poke` — Poke a user.\n"
+            f"{ACTION_EMOJIS['pick_up']} `/pick_up` — Pick up a user."
+        ),
+        inline=True
+    )
+    info_embed.add_field(
+        name="‎",
+        value="‎",  # spacer to balance columns
+        inline=True
+    )
+
+    info_embed.add_field(
+        name="✨ Spellcasters",
+        value=(
+            "💫 `/revive` — Revive a dead user.\n"
+            "🔮 `/change_size` — Change a user's size role.\n"
+            "🌅 `/revive_all` — Revive everyone who is dead.\n"
+            "📏 `/size_all` — Set or clear sizes for a role or everyone."
+        ),
+        inline=False
+    )
+
+    info_embed.add_field(
+        name="📊 Stats",
+        value=(
+            "📈 `/stats` — Show a user's kills, deaths and time at each size.\n"
+            "🏆 `/leaderboard` — Show the server's top players."
+        ),
+        inline=False
+    )
+
+    info_embed.set_footer(text="Thank you for using Demise 💀")
+
+    @bot.tree.command(name="info", description="List all available commands.")
+    async def info(interaction: discord.Interaction):
+        await interaction.response.send_message(embed=info_embed, ephemeral=True)
 
     # --- Invite ---
-    @bot.tree.command(name="invite", description="Get an invite link to add the bot.")
-    async def invite(interaction: discord.Interaction):
-        app_info = await bot.application_info()
+    def build_invite_embed(app_info):
         invite_link = (
             f"https://discord.com/oauth2/authorize?client_id={app_info.id}&permissions=8&scope=bot%20applications.commands"
         )
-        embed = discord.Embed(
+        return discord.Embed(
             title="🔗 Invite Demise",
             description=f"[Click here to invite Demise to your server]({invite_link})",
             colour=discord.Colour.blurple(),
         )
+
+    @bot.tree.command(name="invite", description="Get an invite link to add the bot.")
+    async def invite(interaction: discord.Interaction):
+        embed = await response_cache.derived("invite_embed", build_invite_embed)
         await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+setup, teardown = command_module(register)
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import asyncio
+
+import yarl
+import discord
+from discord.gateway import DiscordWebSocket
+from discord.state import ConnectionState
+
+from cogs.metrics import Metric, metrics
+
+# ---------------- CONFIG ----------------
+SESSION_PATH = os.getenv("DEMISE_SESSION_PATH", "gateway_session.json")  # saved on SIGTERM, consumed on start
+SESSION_MAX_AGE = float(os.getenv("DEMISE_SESSION_MAX_AGE", 120))  # seconds; Discord drops idle sessions soon after
+RESUMABLE_CLOSE = 4000  # any close code but 1000/1001 keeps the session alive on Discord's side
+# ----------------------------------------
+
+# Private discord.py internals this module relies on, written against 2.6
+# (requirements.txt pins 2.6.4). On another minor version, or if one of these
+# is missing, install() leaves the bot alone and every start IDENTIFYs.
+# save() also reads ws.session_id/sequence/gateway and the private model
+# attributes used by the payload helpers below; if those fail it skips saving.
+SUPPORTED_DISCORD = (2, 6)
+PRIVATE_HOOKS = (
+    (DiscordWebSocket, "from_client"),  # patched so the first connection RESUMEs
+    (ConnectionState, "_add_guild_from_data"),  # loads the snapshot as GUILD_CREATE payloads
+    (ConnectionState, "call_handlers"),  # marks the cache ready after RESUMED
+)
+
+
+def hooks_available() -> bool:
+    if (discord.version_info.major, discord.version_info.minor) != SUPPORTED_DISCORD:
+        return False
+    return all(hasattr(owner, name) for owner, name in PRIVATE_HOOKS)
+
+
+# --- Cache snapshot (gateway GUILD_CREATE shaped, so it loads like READY would) ---
+def _role_payload(role: discord.Role) -> dict:
+    payload = {
+        "id": str(role.id), "name": role.name, "permissions": str(role._permissions), "position": role.position,
+        "color": role._colour,
+        "colors": {"primary_color": role._colour, "secondary_color": role._secondary_colour,
+                   "tertiary_color": role._tertiary_colour},
+        "hoist": role.hoist, "icon": role._icon, "unicode_emoji": role.unicode_emoji, "managed": role.managed,
+        "mentionable": role.mentionable, "flags": role._flags,
+    }
+    tags = role.tags
+    if tags is not None:
+        payload["tags"] = {k: str(v) for k, v in (("bot_id", tags.bot_id), ("integration_id", tags.integration_id),
+                                                  ("subscription_listing_id", tags.subscription_listing_id)) if v}
+        if tags.is_premium_subscriber():
+            payload["tags"]["premium_subscriber"] = None
+    return payload
+
+
+def _channel_payload(channel) -> dict:
+    payload = {
+        "id": str(channel.id), "type": channel.type.value, "name": channel.name, "position": channel.position,
+        "parent_id": str(channel.category_id) if channel.category_id else None,
+        "permission_overwrites": [dict(o._asdict(), id=str(o.id)) for o in channel._overwrites],
+    }
+    for key, attr in (("topic", "topic"), ("nsfw", "nsfw"), ("rate_limit_per_user", "slowmode_delay"),
+                      ("bitrate", "bitrate"), ("user_limit", "user_limit"), ("rtc_region", "rtc_region")):
+        value = getattr(channel, attr, None)
+        if value is not None:
+            payload[key] = value
+    last_message_id = getattr(channel, "last_message_id", None)
+    if last_message_id:
+        payload["last_message_id"] = str(last_message_id)
+    return payload
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _emoji_payload(emoji: discord.Emoji) -> dict:
+    return {
+        "id": str(emoji.id), "name": emoji.name, "roles": [str(r) for r in emoji._roles],
+        "require_colons": emoji.require_colons, "managed": emoji.managed, "animated": emoji.animated,
+        "available": emoji.available,
+    }
+
+
+def _sticker_payload(sticker: discord.GuildSticker) -> dict:
+    return {
+        "id": str(sticker.id), "name": sticker.name, "description": sticker.description, "tags": sticker.emoji,
+        "type": sticker.type.value, "format_type": sticker.format.value, "available": sticker.available,
+        "guild_id": str(sticker.guild_id),
+    }
+
+
+def _thread_payload(thread: discord.Thread) -> dict:
+    payload = {
+        "id": str(thread.id), "guild_id": str(thread.guild.id), "parent_id": str(thread.parent_id),
+        "owner_id": str(thread.owner_id), "name": thread.name, "type": thread.type.value,
+        "last_message_id": str(thread.last_message_id) if thread.last_message_id else None,
+        "rate_limit_per_user": thread.slowmode_delay, "message_count": thread.message_count,
+        "member_count": thread.member_count, "total_message_sent": thread.total_message_sent,
+        "flags": thread._flags, "applied_tags": [str(t) for t in thread._applied_tags],
+        "thread_metadata": {
+            "archived": thread.archived, "archiver_id": str(thread.archiver_id) if thread.archiver_id else None,
+            "auto_archive_duration": thread.auto_archive_duration,
+            "archive_timestamp": _iso(thread.archive_timestamp), "locked": thread.locked,
+            "invitable": thread.invitable, "create_timestamp": _iso(thread._created_at),
+        },
+    }
+    if thread.me is not None:
+        payload["member"] = {"id": str(thread.id), "user_id": str(thread.me.id),
+                             "join_timestamp": _iso(thread.me.joined_at), "flags": thread.me.flags}
+    return payload
+
+
+def _member_payload(member: discord.Member) -> dict:
+    user = member._user
+    return {
+        "user": {
+            "id": str(user.id), "username": user.name, "discriminator": user.discriminator,
+            "global_name": user.global_name, "avatar": user._avatar, "bot": user.bot,
+            "public_flags": user._public_flags,
+        },
+        "roles": [str(r) for r in member._roles], "nick": member.nick, "avatar": member._avatar,
+        "joined_at": _iso(member.joined_at), "premium_since": _iso(member.premium_since),
+        "communication_disabled_until": _iso(member.timed_out_until), "pending": member.pending,
+        "flags": member._flags,
+    }
+
+
+def guild_payload(guild: discord.Guild) -> dict:
+    """The guild cache READY would have built: roles, channels, threads, emojis, stickers and cached members."""
+    return {
+        "id": str(guild.id), "name": guild.name, "icon": guild._icon, "owner_id": str(guild.owner_id),
+        "features": list(guild.features), "member_count": guild._member_count, "large": guild._large,
+        "preferred_locale": str(guild.preferred_locale), "premium_tier": guild.premium_tier,
+        "roles": [_role_payload(r) for r in guild.roles],
+        "channels": [_channel_payload(c) for c in guild.channels],
+        "threads": [_thread_payload(t) for t in guild.threads],
+        "emojis": [_emoji_payload(e) for e in guild.emojis],
+        "stickers": [_sticker_payload(s) for s in guild.stickers],
+        "members": [_member_payload(m) for m in guild.members],
+    }
+
+
+def _write(path: str, data: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _take(path: str):
+    """Read and delete the saved session; a session is only ever resumed once."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return data
+
+
+class GatewaySession:
+    """Carries the gateway session across a restart so the next process RESUMEs.
+
+    On SIGTERM, `save()` records the session ID, sequence and resume URL
+    together with a snapshot of the guild cache taken at that sequence. The
+    socket is closed with a non-1000 code so Discord keeps the session.
+    On start, `restore()` loads the snapshot and makes the first connection
+    RESUME. Discord then replays only the events missed while the bot was
+    down, with no READY, guild stream or member chunking. If the session has
+    expired, Discord invalidates it and discord.py falls back to IDENTIFY;
+    READY clears the snapshot and the cache is rebuilt as usual.
+
+    Single-process (unsharded) bots only: AutoShardedBot connects its
+    shards outside Client.connect and always identifies. Nothing is saved
+    when the snapshot would be incomplete (unavailable guilds, or a
+    discord.py whose internals don't match PRIVATE_HOOKS), so those starts
+    IDENTIFY normally.
+    """
+
+    def __init__(self, path: str = SESSION_PATH, max_age: float = SESSION_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.bot = None
+        self._resume = None  # from_client kwargs for the first connection
+        self._restoring = False
+        self._saved = None
+        self.identifies = 0
+        self.resumes = 0
+        self.restored = 0
+        self.invalidated = 0
+
+    # --- Setup ---
+    def install(self, bot):
+        if isinstance(bot, discord.AutoShardedClient) or self.bot is not None:
+            return
+        if not hooks_available():
+            print(f"⚠️ discord.py {discord.__version__} is not supported by gateway session resume; "
+                  "restarts will IDENTIFY.")
+            return
+        self.bot = bot
+        original = DiscordWebSocket.from_client
+
+        # Client.connect builds its first websocket with fixed arguments; this
+        # is the only place to turn that IDENTIFY into a RESUME.
+        async def from_client(client, **params):
+            resume, self._resume = self._resume, None
+            if resume and client is bot:
+                params.update(resume)
+            return await original(client, **params)
+
+        DiscordWebSocket.from_client = from_client
+        bot.add_listener(self._on_socket_event_type, "on_socket_event_type")
+        metrics.register(self.collect)
+
+    # --- Shutdown ---
+    def save(self):
+        """Capture the session and cache; call right before `close()`.
+
+        Nothing here awaits, so no event lands between the sequence number
+        and the snapshot.
+        """
+        bot = self.bot
+        ws = bot.ws if bot is not None else None
+        if ws is None or ws.session_id is None or not bot.is_ready():
+            return False
+        if any(g.unavailable for g in bot.guilds):
+            print("⏭️  Some guilds are unavailable; not saving the gateway session.")
+            return False
+        started = time.perf_counter()
+        try:
+            self._saved = {
+                "session_id": ws.session_id, "sequence": ws.sequence, "gateway": str(ws.gateway),
+                "user_id": bot.user.id, "saved_at": time.time(),
+                "guilds": [guild_payload(g) for g in bot.guilds],
+            }
+        except (AttributeError, TypeError, ValueError):
+            print("⚠️ Could not snapshot the guild cache; the next start will IDENTIFY.")
+            return False
+        print(f"💾 Saved gateway session at sequence {ws.sequence} "
+              f"({len(self._saved['guilds'])} guilds in {time.perf_counter() - started:.2f}s)")
+        return True
+
+    async def close(self):
+        """Close the bot; after a successful `save()` the session stays resumable."""
+        ws = self.bot.ws
+        if self._saved is not None and ws is not None:
+            close = ws.close  # Client.close() always sends 1000, which ends the session
+            ws.close = lambda code=RESUMABLE_CLOSE: close(code=RESUMABLE_CLOSE)
+        await self.bot.close()
+
+    async def flush(self):
+        """Write the session captured by `save()`; call once the bot has closed."""
+        saved, self._saved = self._saved, None
+        if saved is not None:
+            await asyncio.to_thread(_write, self.path, saved)
+
+    # --- Startup ---
+    async def restore(self, bot):
+        """Load a saved session and arm the first connection to RESUME it. Call after login."""
+        if self.bot is not bot:
+            return False
+        data = await asyncio.to_thread(_take, self.path)
+        if data is None:
+            return False
+        age = time.time() - data.get("saved_at", 0)
+        if age > self.max_age or data.get("user_id") != bot.user.id:
+            print(f"⏭️  Saved gateway session is stale ({age:.0f}s old) or for another bot; identifying.")
+            return False
+
+        state = bot._connection
+        for payload in data["guilds"]:
+            state._add_guild_from_data(payload)
+        self._resume = {
+            "session": data["session_id"], "sequence": data["sequence"],
+            "gateway": yarl.URL(data["gateway"]), "resume": True,
+        }
+        self._restoring = True
+        print(f"⚡ Resuming gateway session from sequence {data['sequence']} "
+              f"({len(data['guilds'])} guilds from snapshot, {age:.0f}s old)")
+        return True
+
+    async def _on_socket_event_type(self, event: str):
+        if event == "READY":
+            self.identifies += 1
+            if self._restoring:
+                self._restoring = False
+                self.invalidated += 1
+                print("🆕 Saved gateway session was invalidated; fell back to IDENTIFY.")
+        elif event == "RESUMED":
+            self.resumes += 1
+            if self._restoring:
+                self._restoring = False
+                self.restored += 1
+                # No READY follows a RESUME; the snapshot is the cache, so mark ready ourselves.
+                self.bot._connection.call_handlers("ready")
+                self.bot.dispatch("ready")
+
+    def collect(self):
+        connects = Metric("demise_gateway_connects_total", "counter", "Gateway sessions started, by handshake.")
+        connects.add(self.identifies, kind="identify")
+        connects.add(self.resumes, kind="resume")
+        yield connects
+        restores = Metric("demise_gateway_session_restores_total", "counter",
+                          "Sessions carried over from a previous process, by outcome.")
+        restores.add(self.restored, result="resumed")
+        restores.add(self.invalidated, result="invalidated")
+        yield restores
+
+
+gateway_session = GatewaySession()
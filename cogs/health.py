@@ -0,0 +1,120 @@
+import json
+import time
+import asyncio
+
+from aiohttp import web
+
+from cogs.metrics import Metric, metrics
+
+
+class HealthServer:
+    """Liveness, readiness and Prometheus metrics served on the bot's event loop."""
+
+    LAG_INTERVAL = 0.5  # seconds between event-loop lag probes
+
+    def __init__(self, bot, port: int, host: str = "0.0.0.0"):
+        self.bot = bot
+        self.port = port
+        self.host = host
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0
+        self._runner = None
+        self._lag_task = None
+        self._routes = []
+        self.started_at = time.time()
+
+    def add_route(self, method: str, path: str, handler):
+        """Serve an extra endpoint (e.g. HTTP interactions). Call before start()."""
+        self._routes.append((method, path, handler))
+
+    # --- Lifecycle ---
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/readyz", self.readyz)
+        app.router.add_get("/metrics", self.prometheus)
+        for method, path, handler in self._routes:
+            app.router.add_route(method, path, handler)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_task = asyncio.get_running_loop().create_task(self._measure_loop_lag())
+        metrics.register(self.collect)
+        print(f"🌐 Health server running on port {self.port}")
+
+    async def stop(self):
+        metrics.unregister(self.collect)
+        if self._lag_task:
+            self._lag_task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _measure_loop_lag(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.LAG_INTERVAL)
+            self.loop_lag = max(0.0, time.monotonic() - start - self.LAG_INTERVAL)
+            self.loop_lag_max = max(self.loop_lag_max, self.loop_lag)
+
+    # --- Checks ---
+    def connected(self) -> bool:
+        bot = self.bot
+        if getattr(bot, "http_interactions", False):
+            return bot.user is not None and not bot.is_closed()  # no gateway in HTTP interactions mode
+        return bot.is_ready() and not bot.is_closed()
+
+    def readiness(self) -> dict:
+        bot = self.bot
+        return {
+            "gateway": self.connected(),
+            "cogs_loaded": getattr(bot, "cogs_loaded", False),
+            "views_restored": getattr(bot, "views_restored", False),
+        }
+
+    # --- Handlers ---
+    async def healthz(self, request):
+        return web.Response(text="ok")
+
+    async def readyz(self, request):
+        checks = self.readiness()
+        status = 200 if all(checks.values()) else 503
+        return web.Response(status=status, text=json.dumps(checks), content_type="application/json")
+
+    async def prometheus(self, request):
+        return web.Response(body=metrics.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    # --- Metrics ---
+    def collect(self):
+        bot = self.bot
+        yield Metric("demise_up", "gauge", "1 if the gateway is connected and ready.").add(int(self.connected()))
+        yield Metric("demise_ready", "gauge", "1 if every readiness check passes.").add(
+            int(all(self.readiness().values())))
+        yield Metric("demise_gateway_latency_seconds", "gauge", "Gateway heartbeat latency.").add(bot.latency)
+        yield Metric("demise_guilds", "gauge", "Guilds in cache.").add(len(bot.guilds))
+        shard_ids = getattr(bot, "shards", None)
+        if shard_ids:
+            latency = Metric("demise_shard_latency_seconds", "gauge", "Gateway heartbeat latency per shard.")
+            for shard_id, shard_latency in bot.latencies:
+                latency.add(shard_latency, shard=shard_id)
+            yield latency
+            counts = dict.fromkeys(shard_ids, 0)
+            for guild in bot.guilds:
+                counts[guild.shard_id] = counts.get(guild.shard_id, 0) + 1
+            guilds = Metric("demise_shard_guilds", "gauge", "Guilds in cache per shard.")
+            for shard_id, count in sorted(counts.items()):
+                guilds.add(count, shard=shard_id)
+            yield guilds
+        yield Metric("demise_cached_users", "gauge", "Users in cache.").add(len(bot.users))
+        yield Metric("demise_cached_members", "gauge", "Members in cache across all guilds.").add(
+            sum(len(g.members) for g in bot.guilds))
+        yield Metric("demise_cached_messages", "gauge", "Messages in cache.").add(len(bot.cached_messages))
+        yield Metric("demise_persistent_views", "gauge", "Persistent views registered.").add(
+            len(bot.persistent_views))
+        yield Metric("demise_event_loop_lag_seconds", "gauge", "Latest event loop scheduling lag.").add(
+            self.loop_lag)
+        yield Metric("demise_event_loop_lag_max_seconds", "gauge", "Worst event loop lag observed.").add(
+            self.loop_lag_max)
+        yield Metric("demise_uptime_seconds", "gauge", "Seconds since the process started.").add(
+            time.time() - self.started_at)
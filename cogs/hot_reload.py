@@ -0,0 +1,155 @@
+import os
+import sys
+import asyncio
+import traceback
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from cogs.checks import is_bot_owner
+from cogs.sync import DEV_GUILD_ID
+
+# ---------------- CONFIG ----------------
+WATCH = os.getenv("DEMISE_RELOAD_WATCH", "").lower() in ("1", "true", "yes")  # reload extensions when their file changes
+WATCH_INTERVAL = float(os.getenv("DEMISE_RELOAD_WATCH_INTERVAL", 2.0))  # seconds between file checks
+# ----------------------------------------
+
+def command_module(register):
+    """setup/teardown for a `register(bot, helpers)` command module.
+
+    setup() registers the module's commands with `bot.helpers`; teardown()
+    removes exactly the commands it added, so `bot.reload_extension`
+    swaps them in place.
+    """
+    added = []  # [(guild, command)]
+
+    def snapshot(tree):
+        found = []
+        for guild in (None, discord.Object(id=DEV_GUILD_ID)):
+            found.extend((guild, command) for command in tree.get_commands(guild=guild))
+        return found
+
+    async def setup(bot):
+        before = {id(command) for _, command in snapshot(bot.tree)}
+        register(bot, bot.helpers)
+        added[:] = [(g, c) for g, c in snapshot(bot.tree) if id(c) not in before]
+
+    async def teardown(bot):
+        for guild, command in added:
+            kind = getattr(command, "type", discord.AppCommandType.chat_input)
+            bot.tree.remove_command(command.name, guild=guild, type=kind)
+        added.clear()
+
+    return setup, teardown
+
+
+class HotReload(commands.Cog):
+    """Reload extensions without dropping the gateway connection.
+
+    reload_extension runs teardown and setup without yielding to the event
+    loop, so no interaction is dispatched while a command is missing.
+    Handlers already running keep the old module's functions and finish
+    normally. Afterwards, the roles cog re-attaches persistent views, and
+    the command tree is synced only if payloads changed.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._lock = asyncio.Lock()
+        self._mtimes = {}
+        self._watch_task = None
+
+    async def cog_load(self):
+        if WATCH:
+            self._mtimes = self._source_mtimes()
+            self._watch_task = asyncio.get_running_loop().create_task(self._watch())
+            print(f"👀 Watching {len(self._mtimes)} extension(s) for changes")
+
+    async def cog_unload(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+
+    def reloadable(self):
+        return sorted(self.bot.extensions)
+
+    async def reload(self, names):
+        """Reload `names` in order and sync if the command payloads changed.
+
+        Returns ([(name, error or None)], sync results or None).
+        """
+        results = []
+        async with self._lock:
+            for name in names:
+                try:
+                    await self.bot.reload_extension(name)
+                    print(f"♻️  Reloaded extension: {name}")
+                    results.append((name, None))
+                except Exception as e:
+                    # discord.py rolls back to the previous module on a failed load.
+                    print(f"❌ Failed to reload {name}:\n{traceback.format_exc()}")
+                    results.append((name, e))
+            synced = await self._sync()
+        return results, synced
+
+    async def _sync(self):
+        sync = self.bot.get_cog("Sync")
+        shard_ids = getattr(self.bot, "shard_ids", None)
+        if sync is None or (shard_ids is not None and 0 not in shard_ids):
+            return None  # only the cluster that owns shard 0 syncs
+        try:
+            return await sync.sync_all()
+        except Exception as e:
+            print(f"❌ Sync after reload failed: {e}")
+            return None
+
+    # --- File watcher ---
+    def _source_mtimes(self):
+        mtimes = {}
+        for name in self.reloadable():
+            if name == __name__:
+                continue  # the watcher can't reload itself; use /reload
+            path = getattr(sys.modules.get(name), "__file__", None)
+            try:
+                mtimes[name] = os.stat(path).st_mtime
+            except (OSError, TypeError):
+                continue
+        return mtimes
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            current = self._source_mtimes()
+            changed = [name for name, mtime in current.items() if self._mtimes.get(name, mtime) != mtime]
+            self._mtimes = current
+            if changed:
+                await self.reload(changed)
+                self._mtimes = self._source_mtimes()
+
+    # --- Command ---
+    @app_commands.command(name="reload", description="Reload bot extensions without restarting (Bot owner only).")
+    @app_commands.describe(extension="Extension to reload (default: all of them)")
+    @app_commands.guilds(discord.Object(id=DEV_GUILD_ID))
+    @is_bot_owner()
+    async def reload_command(self, interaction: discord.Interaction, extension: str = None):
+        names = self.reloadable()
+        if extension is not None and extension not in names:
+            await interaction.response.send_message(f"❌ `{extension}` is not a reloadable extension.", ephemeral=True)
+            return
+
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        results, synced = await self.reload([extension] if extension else names)
+        lines = [f"{'✅' if error is None else '❌'} `{name}`" + (f": {error}" if error else "")
+                 for name, error in results]
+        if synced is not None:
+            uploaded = [str(scope) for scope, count in synced.items() if count is not None]
+            lines.append(f"🔄 Synced: {', '.join(uploaded)}" if uploaded else "⏭️ Commands unchanged, no sync needed.")
+        await interaction.followup.send("\n".join(lines), ephemeral=True)
+
+    @reload_command.autocomplete("extension")
+    async def reload_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [app_commands.Choice(name=name, value=name) for name in self.reloadable() if current in name][:25]
+
+
+async def setup(bot):
+    await bot.add_cog(HotReload(bot))
@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import asyncio
+import traceback
+
+import discord
+from aiohttp import web
+from discord.webhook.async_ import async_context
+
+from cogs.metrics import Metric, metrics
+from cogs.instrumentation import perf, _InstrumentedWebhookAdapter
+from cogs.roles import restore_persistent_views
+
+try:
+    from nacl.signing import VerifyKey
+    from nacl.exceptions import BadSignatureError
+except ImportError:  # optional: only needed for the HTTP interactions mode
+    VerifyKey = None
+
+# ---------------- CONFIG ----------------
+PUBLIC_KEY = os.getenv("DEMISE_PUBLIC_KEY", "")  # application public key (hex), from the developer portal
+INTERACTIONS_PATH = os.getenv("DEMISE_INTERACTIONS_PATH", "/interactions")
+INLINE_TIMEOUT = 2.5  # seconds to wait for a handler before deferring (Discord allows 3)
+MAX_CLOCK_SKEW = 300  # seconds; older signed timestamps are rejected as replays
+SNAPSHOT_TTL = float(os.getenv("DEMISE_GUILD_SNAPSHOT_TTL", 300))  # seconds before a guild's roles are refetched
+TOKEN_TTL = 900  # seconds an interaction token stays valid for edits and follow-ups
+# ----------------------------------------
+
+PING = 1
+PONG = {"type": 1}
+# Deferred responses used when a handler misses INLINE_TIMEOUT, by interaction type.
+DEFERRED = {
+    2: {"type": 5},  # application command -> "thinking..."
+    3: {"type": 6},  # component -> deferred update
+    4: {"type": 8, "data": {"choices": []}},  # autocomplete -> no suggestions
+    5: {"type": 6},  # modal submit -> deferred update
+}
+CHANNEL_MESSAGE = 4
+DEFERRED_CHANNEL_MESSAGE = 5
+UPDATE_MESSAGE = 7
+EPHEMERAL_FLAG = 64
+
+
+class InlineResponseAdapter(_InstrumentedWebhookAdapter):
+    """Answers the pending webhook request instead of POSTing to the callback endpoint.
+
+    Everything else (follow-ups, edits) goes over REST as usual. A response
+    that arrives after the endpoint auto-deferred the interaction can't use
+    the callback endpoint any more, so it becomes an edit of the original
+    response or a follow-up.
+    """
+
+    def __init__(self, endpoint):
+        super().__init__()
+        self.endpoint = endpoint
+
+    def create_interaction_response(self, interaction_id, token, *, session, proxy=None, proxy_auth=None, params):
+        deferred = self.endpoint.auto_deferred.get(int(interaction_id))
+        if deferred is not None:
+            return self._late_response(interaction_id, token, deferred, params,
+                                       session=session, proxy=proxy, proxy_auth=proxy_auth)
+
+        future = self.endpoint.pending.pop(int(interaction_id), None)
+        if future is None or future.done() or params.files:
+            # Too late to answer inline (or multipart): use the callback endpoint.
+            if future is not None and not future.done():
+                future.set_result(None)
+            return super().create_interaction_response(
+                interaction_id, token, session=session, proxy=proxy, proxy_auth=proxy_auth, params=params,
+            )
+
+        future.set_result(params.payload)
+        perf.mark_response()
+        return self._inline_result(interaction_id)
+
+    async def _inline_result(self, interaction_id):
+        return {"interaction": {"id": str(interaction_id)}}
+
+    async def _late_response(self, interaction_id, token, deferred, params, **http):
+        body = json.loads(params.multipart[0]["value"]) if params.files else params.payload
+        kind, data = body["type"], dict(body.get("data") or {})
+        application_id = self.endpoint.bot.application_id
+
+        if kind == UPDATE_MESSAGE or (kind == CHANNEL_MESSAGE and deferred == DEFERRED_CHANNEL_MESSAGE):
+            # Replaces the "thinking..." message, or the message a deferred component sits on.
+            data.pop("tts", None)
+            if data.get("flags"):
+                data["flags"] &= ~EPHEMERAL_FLAG  # visibility was fixed by the deferral
+            send = self.edit_original_interaction_response
+        elif kind == CHANNEL_MESSAGE:
+            send = self.execute_webhook  # deferred update: a new message must be a follow-up
+        else:
+            # Late defers have nothing left to do; autocomplete choices and modals are too late.
+            return await self._inline_result(interaction_id)
+
+        if params.files:
+            multipart = [{"name": "payload_json", "value": json.dumps(data)}, *params.multipart[1:]]
+            await send(application_id, token, multipart=multipart, files=params.files, **http)
+        else:
+            await send(application_id, token, payload=data, **http)
+        return await self._inline_result(interaction_id)
+
+
+class InteractionsEndpoint:
+    """Receives interactions over Discord's HTTP webhook instead of the gateway.
+
+    Requests are verified with the application's Ed25519 public key, fed to
+    the ConnectionState exactly as a gateway INTERACTION_CREATE would be, and
+    the handler's first response is returned as the HTTP response body. No
+    gateway connection is needed, so any number of workers can sit behind a
+    load balancer. Guild roles come from REST snapshots refreshed every
+    SNAPSHOT_TTL seconds.
+    """
+
+    def __init__(self, bot, public_key: str = PUBLIC_KEY):
+        if VerifyKey is None:
+            raise RuntimeError("HTTP interactions mode needs PyNaCl: pip install PyNaCl")
+        if not public_key:
+            raise ValueError("❌ HTTP interactions mode needs DEMISE_PUBLIC_KEY.")
+        self.bot = bot
+        self.verify_key = VerifyKey(bytes.fromhex(public_key))
+        self.adapter = InlineResponseAdapter(self)
+        self.pending = {}  # interaction id -> future for the inline response
+        self.auto_deferred = {}  # interaction id -> deferred response type we sent for it
+        self._snapshots = {}  # guild_id -> monotonic fetch time
+        self._refreshing = {}  # guild_id -> task
+        self._closed = asyncio.Event()
+        self.received = 0
+        self.rejected = 0
+        self.deferred = 0
+        bot.http_interactions = True
+
+    def install(self, server):
+        """Add the webhook route to the HealthServer's aiohttp app."""
+        server.add_route("POST", INTERACTIONS_PATH, self.handle)
+        metrics.register(self.collect)
+
+    # --- Lifecycle ---
+    def activate(self):
+        """Send interaction responses through the inline adapter from this context on."""
+        perf.set_webhook_adapter(self.adapter)
+        async_context.set(self.adapter)
+
+    async def run(self, token: str):
+        """Log in over REST and serve interactions until `close()`."""
+        self.activate()
+        await self.bot.login(token)
+        await self._restore_views()
+        print(f"📨 Serving HTTP interactions on {INTERACTIONS_PATH} as {self.bot.user}")
+        try:
+            await self._closed.wait()
+        finally:
+            await self.bot.close()
+
+    def close(self):
+        self._closed.set()
+
+    async def _restore_views(self):
+        from cogs.selector_registry import registry
+
+        guild_ids = {record.guild_id for record in await registry.all()}
+        await asyncio.gather(*(self._snapshot(guild_id) for guild_id in guild_ids), return_exceptions=True)
+        await restore_persistent_views(self.bot)
+
+    # --- Guild snapshots ---
+    async def _snapshot(self, guild_id: int):
+        task = self._refreshing.get(guild_id)
+        if task is None:
+            task = self._refreshing[guild_id] = asyncio.get_running_loop().create_task(self._fetch_guild(guild_id))
+            task.add_done_callback(lambda _: self._refreshing.pop(guild_id, None))
+        await task
+
+    async def _fetch_guild(self, guild_id: int):
+        guild = await self.bot.fetch_guild(guild_id)
+        self.bot._connection._add_guild(guild)
+        self.bot.role_index.invalidate(guild)
+        self._snapshots[guild_id] = time.monotonic()
+
+    async def _ensure_guild(self, guild_id):
+        if guild_id is None:
+            return
+        fetched = self._snapshots.get(guild_id)
+        if fetched is None:
+            if self.bot.get_guild(guild_id) is None:
+                await self._snapshot(guild_id)  # first interaction from this guild
+            return  # otherwise the gateway owns this guild's cache
+        if time.monotonic() - fetched > SNAPSHOT_TTL and guild_id not in self._refreshing:
+            self._refreshing[guild_id] = task = asyncio.get_running_loop().create_task(self._fetch_guild(guild_id))
+            task.add_done_callback(lambda _: self._refreshing.pop(guild_id, None))
+
+    # --- Webhook ---
+    def verify(self, headers, body: bytes) -> bool:
+        signature = headers.get("X-Signature-Ed25519")
+        timestamp = headers.get("X-Signature-Timestamp")
+        if not signature or not timestamp:
+            return False
+        try:
+            if abs(time.time() - int(timestamp)) > MAX_CLOCK_SKEW:
+                return False
+            self.verify_key.verify(timestamp.encode() + body, bytes.fromhex(signature))
+        except (BadSignatureError, ValueError):
+            return False
+        return True
+
+    async def handle(self, request: web.Request):
+        body = await request.read()
+        if not self.verify(request.headers, body):
+            self.rejected += 1
+            return web.Response(status=401, text="invalid request signature")
+
+        data = json.loads(body)
+        if data.get("type") == PING:
+            return web.json_response(PONG)
+
+        self.received += 1
+        guild_id = discord.utils._get_as_snowflake(data, "guild_id")
+        try:
+            await self._ensure_guild(guild_id)
+        except discord.HTTPException:
+            print(f"⚠️ Could not snapshot guild {guild_id}:\n{traceback.format_exc()}")
+
+        interaction_id = int(data["id"])
+        future = self.pending[interaction_id] = asyncio.get_running_loop().create_future()
+        async_context.set(self.adapter)  # inherited by the handler tasks created below
+        self.bot._connection.parse_interaction_create(data)
+
+        try:
+            payload = await asyncio.wait_for(asyncio.shield(future), INLINE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.pending.pop(interaction_id, None)
+            if future.done():
+                payload = future.result()
+            else:
+                future.cancel()
+                self.deferred += 1
+                payload = DEFERRED.get(data.get("type"), {"type": 6})
+                self._mark_deferred(interaction_id, payload["type"])
+
+        if payload is None:
+            return web.Response(status=202)  # already answered through the callback endpoint
+        return web.json_response(payload)
+
+    def _mark_deferred(self, interaction_id: int, response_type: int):
+        """Route the handler's eventual response to an edit or follow-up until the token expires."""
+        self.auto_deferred[interaction_id] = response_type
+        asyncio.get_running_loop().call_later(TOKEN_TTL, self.auto_deferred.pop, interaction_id, None)
+
+    # --- Metrics ---
+    def collect(self):
+        yield Metric("demise_http_interactions_total", "counter", "Interactions received over HTTP.").add(
+            self.received)
+        yield Metric("demise_http_interactions_rejected_total", "counter", "Requests with a bad signature.").add(
+            self.rejected)
+        yield Metric("demise_http_interactions_deferred_total", "counter",
+                     "Interactions auto-deferred after missing the inline deadline.").add(self.deferred)
+        yield Metric("demise_guild_snapshots", "gauge", "Guilds cached from REST snapshots.").add(
+            len(self._snapshots))
@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import asyncio
+import contextvars
+from collections import deque
+
+import aiohttp
+import discord
+from discord import app_commands
+from discord.webhook.async_ import async_context
+
+from cogs.metrics import Metric, metrics
+from cogs.rest_scheduler import SchedulingWebhookAdapter
+
+# ---------------- CONFIG ----------------
+PERF_SAMPLES = int(os.getenv("DEMISE_PERF_SAMPLES", 2048))  # samples kept per command and series
+PERF_TRACE_PATH = os.getenv("DEMISE_PERF_TRACE")  # optional JSONL trace file
+TRACE_FLUSH_INTERVAL = 5.0  # seconds between trace writes
+TRACE_FLUSH_SIZE = 256  # records buffered before an early flush
+QUANTILES = (0.5, 0.95, 0.99)
+RATELIMIT_MIN_WAIT = 0.05  # seconds off the wire before a REST call counts as rate limited
+# ----------------------------------------
+
+_current = contextvars.ContextVar("demise_perf_record", default=None)
+_wire = contextvars.ContextVar("demise_perf_wire", default=None)  # [seconds on the wire] for the current REST call
+INTERACTION_CALLBACK_PATH = "/interactions/{webhook_id}/{webhook_token}/callback"
+
+
+class CommandRecord:
+    __slots__ = ("command", "guild_id", "started", "first_response", "rest_calls", "rest_time",
+                 "ratelimit_hits", "ratelimit_wait", "failed")
+
+    def __init__(self, command: str, guild_id):
+        self.command = command
+        self.guild_id = guild_id
+        self.started = time.perf_counter()
+        self.first_response = None
+        self.rest_calls = 0
+        self.rest_time = 0.0
+        self.ratelimit_hits = 0
+        self.ratelimit_wait = 0.0
+        self.failed = False
+
+    def add_rest(self, route, duration: float, wire: float):
+        self.rest_calls += 1
+        self.rest_time += duration
+        # Whatever the call didn't spend on the wire was spent waiting: the
+        # global REST budget, discord.py's bucket and global locks, its
+        # pre-emptive sleeps on exhausted buckets and its 429 retry sleeps.
+        waited = duration - wire
+        if waited >= RATELIMIT_MIN_WAIT:
+            self.ratelimit_hits += 1
+            self.ratelimit_wait += waited
+        if self.first_response is None and route.path == INTERACTION_CALLBACK_PATH:
+            self.first_response = time.perf_counter() - self.started
+
+
+class Histogram:
+    """Bounded reservoir of recent samples plus lifetime count and sum."""
+
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self, size: int = PERF_SAMPLES):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, qs=QUANTILES):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [0.0 for _ in qs]
+        return [ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in qs]
+
+
+class _CommandStats:
+    __slots__ = ("latency", "first_response", "rest_calls", "rest_time", "ratelimit_wait", "failures")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.first_response = Histogram()
+        self.rest_calls = Histogram()
+        self.rest_time = Histogram()
+        self.ratelimit_wait = Histogram()
+        self.failures = 0
+
+
+async def _timed(record, route, send):
+    """Await `send()` and charge its duration and wire time to `record`."""
+    wire = [0.0]
+    token = _wire.set(wire)
+    start = time.perf_counter()
+    try:
+        return await send()
+    finally:
+        _wire.reset(token)
+        record.add_rest(route, time.perf_counter() - start, wire[0])
+
+
+class _InstrumentedWebhookAdapter(SchedulingWebhookAdapter):
+    """Times interaction responses and follow-ups, which bypass bot.http."""
+
+    async def request(self, route, *args, **kwargs):
+        send = super().request
+        record = _current.get()
+        if record is None:
+            return await send(route, *args, **kwargs)
+        return await _timed(record, route, lambda: send(route, *args, **kwargs))
+
+
+class PerfTracker:
+    """Per-command latency and REST accounting for app commands."""
+
+    def __init__(self):
+        self.stats = {}
+        self.in_flight = 0
+        self.ratelimit_hits = 0
+        self._adapter = _InstrumentedWebhookAdapter()
+        self.http_trace = aiohttp.TraceConfig()  # passed to the bot as http_trace=
+        self.http_trace.on_request_start.append(self._on_request_start)
+        self.http_trace.on_request_end.append(self._on_request_end)
+        self.http_trace.on_request_exception.append(self._on_request_exception)
+        self._trace = []
+        self._trace_task = None
+        self._installed = False
+
+    # --- Setup ---
+    def install(self, bot):
+        if self._installed:
+            return
+        self._installed = True
+
+        original = bot.http.request
+
+        async def request(route, **kwargs):
+            record = _current.get()
+            if record is None:
+                return await original(route, **kwargs)
+            return await _timed(record, route, lambda: original(route, **kwargs))
+
+        bot.http.request = request
+        metrics.register(self.collect)
+
+    def set_webhook_adapter(self, adapter):
+        """Use `adapter` (an _InstrumentedWebhookAdapter) for interaction responses inside commands."""
+        self._adapter = adapter
+
+    # --- HTTP trace (time on the wire) ---
+    async def _on_request_start(self, session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    def _on_wire(self, ctx):
+        wire = _wire.get()
+        if wire is not None:
+            wire[0] += time.perf_counter() - ctx.started
+
+    async def _on_request_end(self, session, ctx, params):
+        self._on_wire(ctx)
+        if params.response.status == 429:
+            self.ratelimit_hits += 1
+
+    async def _on_request_exception(self, session, ctx, params):
+        self._on_wire(ctx)
+
+    # --- Recording ---
+    def mark_response(self):
+        """Record the first response for the current command when it bypasses REST."""
+        record = _current.get()
+        if record is not None and record.first_response is None:
+            record.first_response = time.perf_counter() - record.started
+
+    def start(self, command: str, guild_id=None) -> CommandRecord:
+        record = CommandRecord(command, guild_id)
+        self.in_flight += 1
+        return record
+
+    def finish(self, record: CommandRecord):
+        self.in_flight -= 1
+        elapsed = time.perf_counter() - record.started
+        stats = self.stats.get(record.command)
+        if stats is None:
+            stats = self.stats[record.command] = _CommandStats()
+        stats.latency.observe(elapsed)
+        if record.first_response is not None:
+            stats.first_response.observe(record.first_response)
+        stats.rest_calls.observe(record.rest_calls)
+        stats.rest_time.observe(record.rest_time)
+        stats.ratelimit_wait.observe(record.ratelimit_wait)
+        if record.failed:
+            stats.failures += 1
+
+        if PERF_TRACE_PATH:
+            self._trace.append({
+                "ts": time.time(),
+                "command": record.command,
+                "guild_id": record.guild_id,
+                "latency": round(elapsed, 6),
+                "first_response": None if record.first_response is None else round(record.first_response, 6),
+                "rest_calls": record.rest_calls,
+                "rest_time": round(record.rest_time, 6),
+                "ratelimit_hits": record.ratelimit_hits,
+                "ratelimit_wait": round(record.ratelimit_wait, 6),
+                "failed": record.failed,
+            })
+            loop = asyncio.get_running_loop()
+            if len(self._trace) >= TRACE_FLUSH_SIZE:
+                loop.create_task(self.flush_trace())
+            elif self._trace_task is None or self._trace_task.done():
+                self._trace_task = loop.create_task(self._flush_trace_later())
+
+    # --- Trace file ---
+    async def _flush_trace_later(self):
+        await asyncio.sleep(TRACE_FLUSH_INTERVAL)
+        await self.flush_trace()
+
+    async def flush_trace(self):
+        if not self._trace or not PERF_TRACE_PATH:
+            return
+        batch, self._trace = self._trace, []
+        lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in batch)
+
+        def write():
+            with open(PERF_TRACE_PATH, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+        try:
+            await asyncio.to_thread(write)
+        except OSError as e:
+            print(f"❌ Failed to write perf trace: {e}")
+
+    # --- Reporting ---
+    def rows(self):
+        """(command, count, p50, p95, p99, avg REST calls, avg rate-limit wait) sorted by p95."""
+        rows = []
+        for name, stats in self.stats.items():
+            p50, p95, p99 = stats.latency.quantiles()
+            rest_avg = stats.rest_calls.total / stats.rest_calls.count if stats.rest_calls.count else 0.0
+            wait_avg = stats.ratelimit_wait.total / stats.ratelimit_wait.count if stats.ratelimit_wait.count else 0.0
+            rows.append((name, stats.latency.count, p50, p95, p99, rest_avg, wait_avg))
+        rows.sort(key=lambda r: r[3], reverse=True)
+        return rows
+
+    def collect(self):
+        series = (
+            ("demise_command_latency_seconds", "End-to-end app command latency.", "latency"),
+            ("demise_command_first_response_seconds", "Time until the first interaction response.", "first_response"),
+            ("demise_command_rest_calls", "REST calls made per command.", "rest_calls"),
+            ("demise_command_rest_seconds", "Time spent in REST calls per command.", "rest_time"),
+            ("demise_command_ratelimit_wait_seconds", "Time REST calls spent rate limited per command.", "ratelimit_wait"),
+        )
+        for metric_name, help, attr in series:
+            metric = Metric(metric_name, "summary", help)
+            for command, stats in self.stats.items():
+                histogram = getattr(stats, attr)
+                for q, value in zip(QUANTILES, histogram.quantiles()):
+                    metric.add(value, command=command, quantile=q)
+                metric.add(histogram.count, suffix="_count", command=command)
+                metric.add(histogram.total, suffix="_sum", command=command)
+            yield metric
+
+        failures = Metric("demise_command_failures_total", "counter", "App commands that raised an error.")
+        for command, stats in self.stats.items():
+            failures.add(stats.failures, command=command)
+        yield failures
+        yield Metric("demise_commands_in_flight", "gauge", "App commands currently running.").add(self.in_flight)
+        yield Metric("demise_ratelimit_hits_total", "counter", "429 responses received from Discord.").add(
+            self.ratelimit_hits)
+
+
+perf = PerfTracker()
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree that records timing and REST usage for every app command."""
+
+    async def _call(self, interaction: discord.Interaction):
+        if interaction.type is not discord.InteractionType.application_command:
+            return await super()._call(interaction)
+
+        record = perf.start(interaction.data.get("name", "?"), interaction.guild_id)
+        token = _current.set(record)
+        adapter_token = async_context.set(perf._adapter)
+        try:
+            await super()._call(interaction)
+            record.failed = interaction.command_failed
+        except Exception:
+            record.failed = True
+            raise
+        finally:
+            async_context.reset(adapter_token)
+            _current.reset(token)
+            perf.finish(record)
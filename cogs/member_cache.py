@@ -0,0 +1,103 @@
+import os
+import time
+from collections import OrderedDict
+
+import discord
+
+from cogs.metrics import Metric, metrics
+
+# ---------------- CONFIG ----------------
+MEMBER_CACHE_SIZE = int(os.getenv("DEMISE_MEMBER_CACHE_SIZE", 10000))  # max members kept
+MEMBER_CACHE_TTL = float(os.getenv("DEMISE_MEMBER_CACHE_TTL", 300))  # seconds before a refetch
+# ----------------------------------------
+
+
+class MemberCache:
+    """Bounded LRU/TTL member cache filled on demand.
+
+    Used in lean mode, where the library keeps no member cache. Members seen
+    in interactions are stored for free; anything else is fetched over REST
+    the first time it is needed.
+    """
+
+    def __init__(self, max_size: int = MEMBER_CACHE_SIZE, ttl: float = MEMBER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._members = OrderedDict()  # (guild_id, member_id) -> (expires_at, member)
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def __len__(self):
+        return len(self._members)
+
+    def put(self, member: discord.Member):
+        key = (member.guild.id, member.id)
+        self._members[key] = (time.monotonic() + self.ttl, member)
+        self._members.move_to_end(key)
+        while len(self._members) > self.max_size:
+            self._members.popitem(last=False)
+
+    def get_cached(self, guild_id: int, member_id: int):
+        entry = self._members.get((guild_id, member_id))
+        if entry is None:
+            return None
+        expires_at, member = entry
+        if expires_at < time.monotonic():
+            del self._members[(guild_id, member_id)]
+            return None
+        self._members.move_to_end((guild_id, member_id))
+        return member
+
+    def discard(self, guild_id: int, member_id: int):
+        self._members.pop((guild_id, member_id), None)
+
+    async def get(self, guild: discord.Guild, member_id: int):
+        """Return a member from the library cache, this cache, or REST (in that order)."""
+        member = guild.get_member(member_id) or self.get_cached(guild.id, member_id)
+        if member is not None:
+            self.hits += 1
+            return member
+
+        self.misses += 1
+        try:
+            member = await guild.fetch_member(member_id)
+        except discord.NotFound:
+            return None
+        self.fetches += 1
+        self.put(member)
+        return member
+
+    async def members_with_role(self, guild: discord.Guild, role: discord.Role):
+        """Yield every member holding `role`, streaming from REST when the guild isn't chunked."""
+        if guild.chunked:
+            for member in role.members:
+                yield member
+            return
+
+        async for member in guild.fetch_members(limit=None):
+            if role.is_default() or member.get_role(role.id):
+                yield member
+
+    # --- Listeners ---
+    async def on_interaction(self, interaction: discord.Interaction):
+        if isinstance(interaction.user, discord.Member):
+            self.put(interaction.user)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.discard(payload.guild_id, payload.user.id)
+
+    def attach(self, bot):
+        bot.add_listener(self.on_interaction, "on_interaction")
+        bot.add_listener(self.on_raw_member_remove, "on_raw_member_remove")
+        metrics.register(self.collect)
+
+    def collect(self):
+        yield Metric("demise_member_cache_size", "gauge", "Members held in the on-demand cache.").add(len(self))
+        yield Metric("demise_member_cache_hits_total", "counter", "Member lookups served from cache.").add(self.hits)
+        yield Metric("demise_member_cache_misses_total", "counter", "Member lookups that missed the cache.").add(
+            self.misses)
+        yield Metric("demise_member_cache_fetches_total", "counter", "Members fetched over REST.").add(self.fetches)
+
+
+member_cache = MemberCache()
@@ -0,0 +1,69 @@
+import math
+
+
+class Metric:
+    __slots__ = ("name", "kind", "help", "samples")
+
+    def __init__(self, name: str, kind: str, help: str, samples=None):
+        self.name = name
+        self.kind = kind  # "gauge", "counter" or "summary"
+        self.help = help
+        self.samples = samples if samples is not None else []  # [(suffix, labels, value)]
+
+    def add(self, value, suffix: str = "", **labels):
+        self.samples.append((suffix, labels, value))
+        return self
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+class MetricsRegistry:
+    """Collects metrics from registered callbacks and renders Prometheus text format.
+
+    Each collector is a zero-argument callable returning an iterable of
+    `Metric` objects; collectors are evaluated on every scrape.
+    """
+
+    def __init__(self):
+        self._collectors = []
+
+    def register(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def unregister(self, collector):
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def collect(self):
+        for collector in list(self._collectors):
+            yield from collector()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
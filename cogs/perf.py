@@ -0,0 +1,41 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from cogs.checks import is_bot_owner
+from cogs.instrumentation import perf
+from cogs.sync import DEV_GUILD_ID
+
+
+class Perf(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="perf", description="Show per-command latency percentiles (Owner-only).")
+    @app_commands.guilds(discord.Object(id=DEV_GUILD_ID))
+    @is_bot_owner()
+    async def perf_report(self, interaction: discord.Interaction):
+        rows = perf.rows()
+        if not rows:
+            return await interaction.response.send_message("ℹ️ No commands recorded yet.", ephemeral=True)
+
+        lines = [f"{'command':<14}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'rest':>6}{'wait':>7}"]
+        for name, count, p50, p95, p99, rest_avg, wait_avg in rows[:25]:
+            lines.append(
+                f"{name[:13]:<14}{count:>6}{p50 * 1000:>7.0f}ms{p95 * 1000:>7.0f}ms{p99 * 1000:>7.0f}ms"
+                f"{rest_avg:>6.1f}{wait_avg:>6.2f}s"
+            )
+        embed = discord.Embed(
+            title="⏱️ Command Performance",
+            description="```\n" + "\n".join(lines) + "\n```",
+            colour=discord.Colour.blurple(),
+        )
+        embed.set_footer(text=f"In flight: {perf.in_flight} • 429s: {perf.ratelimit_hits}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def cog_unload(self):
+        await perf.flush_trace()
+
+
+async def setup(bot):
+    await bot.add_cog(Perf(bot))
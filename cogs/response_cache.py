@@ -0,0 +1,81 @@
+import os
+import time
+import asyncio
+
+import discord
+
+from cogs.metrics import Metric, metrics
+
+# ---------------- CONFIG ----------------
+APP_INFO_TTL = float(os.getenv("DEMISE_APP_INFO_TTL", 3600))  # seconds before application info is refetched
+# ----------------------------------------
+
+
+class ResponseCache:
+    """Memoized application info and the responses derived from it.
+
+    Application info is taken from the login payload or fetched once, kept
+    for APP_INFO_TTL, and refreshed after a gateway reconnect. Derived
+    embeds are rebuilt only when the underlying info changes.
+    """
+
+    def __init__(self, ttl: float = APP_INFO_TTL):
+        self.ttl = ttl
+        self.bot = None
+        self._info = None
+        self._fetched_at = 0.0
+        self._derived = {}
+        self._lock = asyncio.Lock()
+        self._login_info_used = False
+        self.fetches = 0
+
+    def attach(self, bot):
+        self.bot = bot
+        bot.add_listener(self._on_reconnect, "on_ready")
+        bot.add_listener(self._on_reconnect, "on_resumed")
+        metrics.register(self.collect)
+
+    def invalidate(self):
+        self._info = None
+        self._fetched_at = 0.0
+        self._derived.clear()
+
+    async def _on_reconnect(self):
+        self.invalidate()
+
+    async def application_info(self) -> discord.AppInfo:
+        if self._info is not None and time.monotonic() - self._fetched_at < self.ttl:
+            return self._info
+
+        async with self._lock:
+            if self._info is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return self._info
+            # The login payload already carries application info; only hit REST once it's stale.
+            info = None
+            if not self._login_info_used:
+                self._login_info_used = True
+                info = self.bot.application
+            if info is None:
+                info = await self.bot.application_info()
+                self.fetches += 1
+            if self._info is None or info.id != self._info.id:
+                self._derived.clear()
+            self._info = info
+            self._fetched_at = time.monotonic()
+            return info
+
+    async def derived(self, key: str, build):
+        """Return `build(app_info)`, computed once per application info refresh."""
+        info = await self.application_info()
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = build(info)
+        return value
+
+    def collect(self):
+        yield Metric("demise_app_info_fetches_total", "counter", "Application info fetched over REST.").add(self.fetches)
+        yield Metric("demise_response_cache_entries", "gauge", "Derived responses currently memoized.").add(
+            len(self._derived))
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,208 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import contextlib
+import contextvars
+
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+from cogs.metrics import Metric, metrics
+
+# ---------------- CONFIG ----------------
+CLUSTERS = max(1, int(os.getenv("DEMISE_CLUSTERS", 1)))  # processes sharing the bot token's global limit
+# Both are for the whole bot (Discord's global is 50/s per token); each cluster gets an even share.
+REST_RATE = float(os.getenv("DEMISE_REST_RATE", 45)) / CLUSTERS  # requests/second for this process
+BACKGROUND_RESERVE = float(os.getenv("DEMISE_REST_BACKGROUND_RESERVE", 10)) / CLUSTERS  # tokens background work leaves free
+# ----------------------------------------
+
+# Priority classes, lowest value first.
+INTERACTION = 0  # interaction callbacks and follow-ups (counted, never queued)
+USER = 1         # REST made while handling a user's command or click
+BACKGROUND = 2   # startup restores, migrations, mass jobs
+CLASS_NAMES = {INTERACTION: "interaction", USER: "user", BACKGROUND: "background"}
+
+_priority = contextvars.ContextVar("demise_rest_priority", default=USER)
+
+
+@contextlib.contextmanager
+def rest_priority(level: int):
+    """Run REST calls made inside the block (and tasks it spawns) at `level`."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _ClassStats:
+    __slots__ = ("queued", "requests", "delayed", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.queued = 0
+        self.requests = 0
+        self.delayed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class SchedulingWebhookAdapter(AsyncWebhookAdapter):
+    """Counts interaction responses and follow-ups without queueing them.
+
+    Interaction endpoints aren't subject to Discord's global rate limit, so
+    they never wait for (or spend) the shared budget.
+    """
+
+    async def request(self, route, *args, **kwargs):
+        rest_scheduler.count(route, INTERACTION)
+        return await super().request(route, *args, **kwargs)
+
+
+class RestScheduler:
+    """Global outbound REST budget handed out by priority.
+
+    Every bot.http request takes a token from one shared bucket refilled at
+    REST_RATE per second (this process's share of the bot's global limit).
+    When the bucket is empty requests queue, and the queue is drained
+    user-first, then background. Interaction responses bypass the bucket.
+    Background work also leaves BACKGROUND_RESERVE tokens untouched so a
+    burst of interactive traffic never has to wait behind it. Per-route
+    bucket limits and 429 retries stay with discord.py, underneath this.
+    """
+
+    def __init__(self, rate: float = REST_RATE, reserve: float = BACKGROUND_RESERVE):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)  # a small per-cluster share must still fit one request
+        self.reserve = max(0.0, min(reserve, self.capacity - 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._timer = None
+        self._installed = False
+        self.classes = {level: _ClassStats() for level in CLASS_NAMES}
+        self.routes = {}  # route key -> [requests, wait_total]
+
+    # --- Setup ---
+    def install(self, bot):
+        """Route bot.http and interaction webhooks through the scheduler.
+
+        Call before anything else wraps bot.http.request, so wrappers see
+        queueing time as part of the request.
+        """
+        if self._installed:
+            return
+        self._installed = True
+
+        original = bot.http.request
+
+        async def request(route, **kwargs):
+            await self.acquire(route, _priority.get())
+            return await original(route, **kwargs)
+
+        bot.http.request = request
+        # Tasks spawned from here on (gateway, event dispatch) inherit this adapter.
+        async_context.set(SchedulingWebhookAdapter())
+        metrics.register(self.collect)
+
+    # --- Budget ---
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _needed(self, priority: int) -> float:
+        return 1 + (self.reserve if priority == BACKGROUND else 0)
+
+    def count(self, route, priority: int):
+        """Record a request without taking a token; returns its route stats."""
+        self.classes[priority].requests += 1
+        route_stats = self.routes.get(route.key)
+        if route_stats is None:
+            route_stats = self.routes[route.key] = [0, 0.0]
+        route_stats[0] += 1
+        return route_stats
+
+    async def acquire(self, route, priority: int):
+        stats = self.classes[priority]
+        route_stats = self.count(route, priority)
+
+        self._refill(time.monotonic())
+        if not self._waiters and self.tokens >= self._needed(priority):
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        stats.queued += 1
+        stats.delayed += 1
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        finally:
+            if not future.done():
+                future.cancel()  # skipped by _dispatch
+            stats.queued -= 1
+            waited = time.monotonic() - started
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+            route_stats[1] += waited
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill(time.monotonic())
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.tokens < self._needed(priority):
+                break
+            heapq.heappop(self._waiters)
+            self.tokens -= 1
+            future.set_result(None)
+
+        if self._waiters:
+            priority = self._waiters[0][0]
+            delay = (self._needed(priority) - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._dispatch)
+
+    def queued(self, priority: int = None) -> int:
+        if priority is None:
+            return sum(s.queued for s in self.classes.values())
+        return self.classes[priority].queued
+
+    def collect(self):
+        queued = Metric("demise_rest_queue_length", "gauge", "REST requests waiting for the global budget.")
+        requests = Metric("demise_rest_requests_total", "counter", "REST requests scheduled.")
+        delayed = Metric("demise_rest_delayed_total", "counter", "REST requests that had to queue.")
+        wait = Metric("demise_rest_wait_seconds", "summary", "Time REST requests spent queued.")
+        wait_max = Metric("demise_rest_wait_max_seconds", "gauge", "Longest queue wait seen.")
+        for level, name in CLASS_NAMES.items():
+            stats = self.classes[level]
+            queued.add(stats.queued, priority=name)
+            requests.add(stats.requests, priority=name)
+            delayed.add(stats.delayed, priority=name)
+            wait.add(stats.requests, suffix="_count", priority=name)
+            wait.add(stats.wait_total, suffix="_sum", priority=name)
+            wait_max.add(stats.wait_max, priority=name)
+        yield queued
+        yield requests
+        yield delayed
+        yield wait
+        yield wait_max
+
+        route_requests = Metric("demise_rest_route_requests_total", "counter", "REST requests per route.")
+        route_wait = Metric("demise_rest_route_wait_seconds_total", "counter", "Queue wait per route.")
+        for key, (count, waited) in self.routes.items():
+            route_requests.add(count, route=key)
+            route_wait.add(waited, route=key)
+        yield route_requests
+        yield route_wait
+        yield Metric("demise_rest_budget_tokens", "gauge", "Tokens left in the global REST budget.").add(self.tokens)
+
+
+rest_scheduler = RestScheduler()
@@ -0,0 +1,72 @@
+import discord
+
+
+class _GuildRoles:
+    __slots__ = ("by_name", "size_ranks")
+
+    def __init__(self, guild: discord.Guild, size_order):
+        # name -> role IDs in guild.roles order, so the first entry matches discord.utils.get
+        self.by_name = {}
+        for role in guild.roles:
+            self.by_name.setdefault(role.name, []).append(role.id)
+
+        self.size_ranks = {}
+        for rank, size in enumerate(size_order):
+            for role_id in self.by_name.get(size, ()):
+                self.size_ranks[role_id] = rank
+
+
+class RoleIndex:
+    """Per-guild role name -> ID index with precomputed size ranks.
+
+    Guild entries are built lazily on first use and dropped by the role
+    listeners whenever a guild's roles change, so lookups never scan
+    `guild.roles` by name on the interaction path.
+    """
+
+    def __init__(self, size_order):
+        self.size_order = list(size_order)
+        self._guilds = {}
+
+    def _for(self, guild: discord.Guild) -> _GuildRoles:
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = self._guilds[guild.id] = _GuildRoles(guild, self.size_order)
+        return index
+
+    def invalidate(self, guild: discord.Guild):
+        self._guilds.pop(guild.id, None)
+
+    # --- Lookups ---
+    def role_ids(self, guild: discord.Guild, name: str):
+        return self._for(guild).by_name.get(name, ())
+
+    def get_role(self, guild: discord.Guild, name: str):
+        ids = self.role_ids(guild, name)
+        return guild.get_role(ids[0]) if ids else None
+
+    def has_role(self, member: discord.Member, name: str) -> bool:
+        return any(member.get_role(role_id) for role_id in self.role_ids(member.guild, name))
+
+    def size_rank(self, member: discord.Member) -> int:
+        ranks = self._for(member.guild).size_ranks
+        held = [rank for role_id, rank in ranks.items() if member.get_role(role_id)]
+        return min(held) if held else -1
+
+    # --- Listeners ---
+    async def on_guild_role_create(self, role: discord.Role):
+        self.invalidate(role.guild)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            self.invalidate(after.guild)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.invalidate(role.guild)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invalidate(guild)
+
+    def attach(self, bot):
+        for event in ("on_guild_role_create", "on_guild_role_update", "on_guild_role_delete", "on_guild_remove"):
+            bot.add_listener(getattr(self, event), event)
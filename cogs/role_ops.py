@@ -0,0 +1,36 @@
+import discord
+
+
+def target_roles(member: discord.Member, add=(), remove=()):
+    """Compute the member's role list after removing `remove` and adding `add`.
+
+    Returns None when the result is identical to the member's current roles.
+    """
+    current = [r for r in member.roles if not r.is_default()]
+    current_ids = {r.id for r in current}
+    remove_ids = {r.id for r in remove if r is not None}
+    add_roles = [r for r in add if r is not None]
+    add_ids = {r.id for r in add_roles}
+
+    target = [r for r in current if r.id not in remove_ids or r.id in add_ids]
+    target += [r for r in add_roles if r.id not in current_ids]
+    target = list({r.id: r for r in target}.values())
+
+    if {r.id for r in target} == current_ids:
+        return None
+    return target
+
+
+async def mutate_roles(member: discord.Member, *, add=(), remove=(), reason=None):
+    """Apply a role change in a single REST call.
+
+    `remove` is applied before `add`, so a role present in both is kept.
+    Nothing is sent when the member already has the target role set.
+    Returns the edited member if a request was made, otherwise None. The
+    library cache only catches up on the gateway's MEMBER_UPDATE, so build
+    any follow-up change for the same member from the returned object.
+    """
+    roles = target_roles(member, add, remove)
+    if roles is None:
+        return None
+    return await member.edit(roles=roles, reason=reason) or member
@@ -0,0 +1,147 @@
+import os
+import asyncio
+from dataclasses import dataclass, field
+
+import discord
+
+# ---------------- CONFIG ----------------
+PROVISION_CONCURRENCY = int(os.getenv("DEMISE_PROVISION_CONCURRENCY", 3))  # parallel role create/edit/delete calls
+# ----------------------------------------
+
+
+@dataclass(frozen=True)
+class RoleSpec:
+    name: str
+    colour: discord.Colour
+
+
+@dataclass
+class RolePlan:
+    """Changes needed to bring a guild's roles in line with a spec.
+
+    `specs` is ordered bottom to top; applying the plan leaves those roles as
+    one contiguous block in that order.
+    """
+    guild: discord.Guild
+    specs: list
+    create: list = field(default_factory=list)    # RoleSpec
+    recolour: list = field(default_factory=list)  # (discord.Role, RoleSpec)
+    delete: list = field(default_factory=list)    # discord.Role
+    blocked: list = field(default_factory=list)   # discord.Role above the bot's top role
+    reorder: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (self.create or self.recolour or self.delete or self.reorder)
+
+    def describe(self) -> str:
+        lines = []
+        if self.create:
+            lines.append("➕ Create: " + ", ".join(s.name for s in self.create))
+        if self.recolour:
+            lines.append("🎨 Recolour: " + ", ".join(r.name for r, _ in self.recolour))
+        if self.delete:
+            lines.append("🗑️ Delete: " + ", ".join(r.name for r in self.delete))
+        if self.reorder:
+            lines.append("↕️ Reorder: " + " > ".join(s.name for s in reversed(self.specs)))
+        if self.blocked:
+            lines.append("⚠️ Above my top role, skipped: " + ", ".join(r.name for r in self.blocked))
+        return "\n".join(lines) or "ℹ️ Nothing to change."
+
+
+def _manageable(guild: discord.Guild, role: discord.Role) -> bool:
+    me = guild.me
+    return me is None or role < me.top_role
+
+
+def _in_order(roles) -> bool:
+    if not roles:
+        return True
+    positions = [r.position for r in roles]
+    return positions == list(range(positions[0], positions[0] + len(positions)))
+
+
+def plan_setup(guild: discord.Guild, specs, get_role) -> RolePlan:
+    """Diff `specs` (bottom to top) against the guild's cached roles. Makes no REST calls."""
+    plan = RolePlan(guild, list(specs))
+    existing = []
+    for spec in plan.specs:
+        role = get_role(guild, spec.name)
+        if role is None:
+            plan.create.append(spec)
+            continue
+        existing.append(role)
+        if not _manageable(guild, role):
+            plan.blocked.append(role)
+        elif role.colour != spec.colour:
+            plan.recolour.append((role, spec))
+
+    plan.reorder = not plan.blocked and (bool(plan.create) or not _in_order(existing))
+    return plan
+
+
+def plan_remove(guild: discord.Guild, names, get_role) -> RolePlan:
+    plan = RolePlan(guild, [])
+    for name in names:
+        role = get_role(guild, name)
+        if role is None:
+            continue
+        if _manageable(guild, role):
+            plan.delete.append(role)
+        else:
+            plan.blocked.append(role)
+    return plan
+
+
+def _target_positions(guild: discord.Guild, roles, anchor):
+    """Positions for `roles` (bottom to top) as one contiguous block below the bot's top role.
+
+    The block starts at the lowest of the `anchor` roles (those that already
+    existed), so an existing layout only shifts as far as it has to.
+    """
+    base = min((r.position for r in anchor), default=1)
+    me = guild.me
+    if me is not None:
+        base = min(base, me.top_role.position - len(roles))
+    base = max(base, 1)
+    return {role: base + i for i, role in enumerate(roles)}
+
+
+async def apply_plan(plan: RolePlan, get_role, *, reason=None, concurrency: int = PROVISION_CONCURRENCY) -> dict:
+    """Apply `plan` with at most `concurrency` role calls in flight and a single position update.
+
+    Returns the number of roles created, recoloured, deleted and reordered.
+    """
+    guild = plan.guild
+    semaphore = asyncio.Semaphore(concurrency)
+    created = {}
+
+    async def create(spec):
+        async with semaphore:
+            created[spec.name] = await guild.create_role(name=spec.name, colour=spec.colour, reason=reason)
+
+    async def recolour(role, spec):
+        async with semaphore:
+            await role.edit(colour=spec.colour, reason=reason)
+
+    async def delete(role):
+        async with semaphore:
+            await role.delete(reason=reason)
+
+    await asyncio.gather(
+        *(create(spec) for spec in plan.create),
+        *(recolour(role, spec) for role, spec in plan.recolour),
+        *(delete(role) for role in plan.delete),
+    )
+
+    reordered = 0
+    if plan.reorder:
+        roles = [created.get(spec.name) or get_role(guild, spec.name) for spec in plan.specs]
+        roles = [r for r in roles if r is not None]
+        positions = _target_positions(guild, roles, [r for r in roles if r.name not in created])
+        if any(role.position != pos for role, pos in positions.items()):
+            await guild.edit_role_positions(positions=positions, reason=reason)
+            reordered = len(positions)
+
+    return {"created": len(plan.create), "recoloured": len(plan.recolour), "deleted": len(plan.delete),
+            "reordered": reordered}
@@ -0,0 +1,193 @@
+import time
+import asyncio
+import traceback
+from collections import OrderedDict, deque
+
+import discord
+
+from cogs.metrics import Metric, metrics
+from cogs.member_cache import member_cache
+from cogs.role_ops import mutate_roles
+
+# ---------------- CONFIG ----------------
+EDIT_MEMORY = 60.0  # seconds an edited member is preferred over older cached copies
+CLOCK_MARGIN = 1.0  # seconds of skew allowed between Discord's interaction timestamps and ours
+# ----------------------------------------
+
+
+class _PendingUpdate:
+    __slots__ = ("member", "seen_at", "add", "remove", "summary", "interactions", "enqueued_at")
+
+    def __init__(self, member, add, remove, summary, interaction):
+        self.member = member
+        self.seen_at = interaction.created_at.timestamp()  # when Discord took the `member` snapshot
+        self.add = add
+        self.remove = remove
+        self.summary = summary
+        self.interactions = [interaction]
+        self.enqueued_at = time.monotonic()
+
+
+def _merge(updates):
+    """Fold several updates into one (add, remove); a role's last mention wins."""
+    final = {}
+    for update in updates:
+        for role in update.remove:
+            if role is not None:
+                final[role.id] = (False, role)
+        for role in update.add:
+            if role is not None:
+                final[role.id] = (True, role)
+    add = [role for added, role in final.values() if added]
+    remove = [role for added, role in final.values() if not added]
+    return add, remove
+
+
+class _GuildQueue:
+    def __init__(self, owner, guild_id):
+        self.owner = owner
+        self.guild_id = guild_id
+        self.pending = OrderedDict()  # member_id -> {scope: _PendingUpdate}
+        self.worker = None
+
+    def submit(self, interaction, member, add, remove, summary, scope):
+        scopes = self.pending.get(member.id)
+        if scopes is None:
+            scopes = self.pending[member.id] = {}
+        update = scopes.get(scope)
+        if update is None:
+            scopes[scope] = _PendingUpdate(member, add, remove, summary, interaction)
+        else:
+            # Last selection wins; earlier clicks are answered with the final result.
+            update.member, update.add, update.remove, update.summary = member, add, remove, summary
+            update.seen_at = interaction.created_at.timestamp()
+            update.interactions.append(interaction)
+            self.owner.coalesced += 1
+
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self.pending:
+            member_id, scopes = self.pending.popitem(last=False)
+            updates = list(scopes.values())
+            now = time.monotonic()
+            for update in updates:
+                self.owner._record_wait(now - update.enqueued_at)
+
+            # Every menu the member touched goes out as one edit, so no pick
+            # is built on a role list that misses another.
+            add, remove = _merge(updates)
+            member = await self.owner._current(updates[-1])
+            failed = False
+            try:
+                before = {r.id for r in member.roles}
+                result = await mutate_roles(member, add=add, remove=remove)
+                if result is not None:
+                    self.owner._remember(result, before)
+            except discord.HTTPException:
+                print(f"❌ Role update failed in guild {self.guild_id}:\n{traceback.format_exc()}")
+                failed = True
+
+            self.owner.processed += len(updates)
+            for update in updates:
+                message = "❌ Failed to update your roles, please try again." if failed else update.summary
+                for interaction in update.interactions:
+                    try:
+                        await interaction.followup.send(message, ephemeral=True)
+                    except discord.HTTPException:
+                        pass
+
+        self.owner._queues.pop(self.guild_id, None)
+
+
+class RoleUpdateQueue:
+    """Per-guild worker queues for dropdown role updates.
+
+    Pending updates are keyed by member and scope (the menu clicked), so
+    repeated clicks from the same member on one menu collapse into the
+    last one, while picks in different menus of a sharded selector are all
+    kept. The worker then applies all of a member's scopes in one REST call.
+    """
+
+    def __init__(self, wait_samples: int = 512):
+        self._queues = {}
+        self._waits = deque(maxlen=wait_samples)
+        # (guild_id, member_id) -> (role IDs before, edited Member, time.time() of the edit)
+        self._edited = OrderedDict()
+        self.processed = 0
+        self.coalesced = 0
+
+    def submit(self, interaction: discord.Interaction, member: discord.Member, *, add=(), remove=(), summary="",
+               scope=None):
+        queue = self._queues.get(member.guild.id)
+        if queue is None:
+            queue = self._queues[member.guild.id] = _GuildQueue(self, member.guild.id)
+        queue.submit(interaction, member, add, remove, summary, scope)
+
+    # --- Member freshness ---
+    def _remember(self, member: discord.Member, before):
+        member_cache.put(member)
+        key = (member.guild.id, member.id)
+        self._edited[key] = (before, member, time.time())
+        self._edited.move_to_end(key)
+        cutoff = time.time() - EDIT_MEMORY
+        while self._edited and next(iter(self._edited.values()))[2] < cutoff:
+            self._edited.popitem(last=False)
+
+    async def _current(self, update: _PendingUpdate) -> discord.Member:
+        """The freshest copy of the update's member to build the next edit from.
+
+        Member.edit doesn't touch the library cache, and an interaction's
+        member is a snapshot from the click, so both can miss an edit this
+        queue made moments ago.
+        """
+        snapshot = update.member
+        try:
+            # Library cache, then the on-demand LRU (lean mode), then REST.
+            cached = await member_cache.get(snapshot.guild, snapshot.id)
+        except discord.HTTPException:
+            cached = None
+        entry = self._edited.get((snapshot.guild.id, snapshot.id))
+        if entry is not None:
+            before, edited, edited_at = entry
+            cache_behind = cached is None or cached is edited or {r.id for r in cached.roles} == before
+            if cache_behind and update.seen_at <= edited_at + CLOCK_MARGIN and edited_at > time.time() - EDIT_MEMORY:
+                return edited
+            del self._edited[(snapshot.guild.id, snapshot.id)]
+        return cached or snapshot
+
+    def _record_wait(self, seconds: float):
+        self._waits.append(seconds)
+
+    def depth(self) -> int:
+        return sum(len(scopes) for q in self._queues.values() for scopes in q.pending.values())
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "depth": self.depth(),
+            "active_guilds": len(self._queues),
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        }
+
+    def collect(self):
+        stats = self.stats()
+        yield Metric("demise_role_queue_depth", "gauge", "Pending dropdown role updates.").add(stats["depth"])
+        yield Metric("demise_role_queue_active_guilds", "gauge", "Guilds with a running role worker.").add(
+            stats["active_guilds"])
+        yield Metric("demise_role_queue_processed_total", "counter", "Dropdown role updates applied.").add(
+            stats["processed"])
+        yield Metric("demise_role_queue_coalesced_total", "counter", "Dropdown clicks merged into a pending update.").add(
+            stats["coalesced"])
+        yield Metric("demise_role_queue_wait_seconds", "gauge", "Average queue wait over recent updates.").add(
+            stats["wait_avg"])
+        yield Metric("demise_role_queue_wait_max_seconds", "gauge", "Longest queue wait over recent updates.").add(
+            stats["wait_max"])
+
+
+role_queue = RoleUpdateQueue()
+metrics.register(role_queue.collect)
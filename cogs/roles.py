@@ -1,13 +1,45 @@
+import os
+import time
+import asyncio
+import datetime
+from dataclasses import dataclass
 import discord
 from discord.ext import commands
 from discord import app_commands
 
+from cogs.selector_registry import registry
+from cogs.role_queue import role_queue
+from cogs.rest_scheduler import rest_priority, BACKGROUND
+
 # ---------------- CONFIG ----------------
 OWNER_ROLE_NAME = "Owners"   # Only members with this role can use the commands
+MIGRATION_CONCURRENCY = int(os.getenv("DEMISE_MIGRATION_CONCURRENCY", 5))  # channels scanned at once
+SCAN_DEPTH = int(os.getenv("DEMISE_SCAN_DEPTH", 5000))  # default messages scanned by /list and /cleanup
+PROGRESS_INTERVAL = 2.0  # seconds between progress edits
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14, minutes=-5)  # Discord refuses bulk deletes past 14 days
+SELECT_LIMIT = 25  # options per select menu
+MAX_SELECT_ROWS = 5  # components rows per message
 # ----------------------------------------
 
+def _custom_id(multiple: bool, suffix=None) -> str:
+    """Stable selector component IDs; shard 0 keeps the original un-suffixed ID."""
+    base = f"role_dropdown_{'multi' if multiple else 'single'}"
+    return base if suffix in (None, 0) else f"{base}:{suffix}"
+
+
+def _chunks(items, size: int = SELECT_LIMIT):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+@dataclass(frozen=True)
+class _DeletedRole:
+    """Stands in for a deleted role so a restored view keeps its posted shard layout."""
+    id: int
+    name: str = "Deleted role"
+
+
 class RoleDropdown(discord.ui.Select):
-    def __init__(self, options, multiple: bool):
+    def __init__(self, options, multiple: bool, shard: int = 0, scope_ids=None, custom_id=None, row=None):
         max_values = len(options) if multiple else 1
         super().__init__(
             placeholder="Choose your role(s)...",
@@ -17,45 +49,143 @@ class RoleDropdown(discord.ui.Select):
                 discord.SelectOption(label=role.name, value=str(role.id))
                 for role in options
             ],
-            custom_id=f"role_dropdown_{'multi' if multiple else 'single'}"
+            custom_id=custom_id or _custom_id(multiple, shard),
+            row=row,
         )
+        self.multiple = multiple
+        # Single-select swaps out every role of the selector, not just this shard's.
+        self.scope_ids = scope_ids if scope_ids is not None else [role.id for role in options]
+
+    def set_roles(self, roles):
+        """Swap this menu's options in place (used when paging)."""
+        self.options = [discord.SelectOption(label=role.name, value=str(role.id)) for role in roles]
+        if self.multiple:
+            self.max_values = len(roles)
 
     async def callback(self, interaction: discord.Interaction):
+        # Acknowledge first; the role work happens on the guild's update queue.
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
         member = interaction.user
         guild = interaction.guild
-        selected_roles = [guild.get_role(int(role_id)) for role_id in self.values]
-        multiple = self.max_values > 1
-
+        selected_roles = [r for r in (guild.get_role(int(role_id)) for role_id in self.values) if r]
         # remove unselected roles if single-select
-        if not multiple:
-            for option in self.options:
-                role = guild.get_role(int(option.value))
-                if role in member.roles and role not in selected_roles:
-                    await member.remove_roles(role)
+        unselected = []
+        if not self.multiple:
+            unselected = [guild.get_role(role_id) for role_id in self.scope_ids]
 
-        for role in selected_roles:
-            if role not in member.roles:
-                await member.add_roles(role)
-
-        await interaction.response.send_message(
-            f"✅ Roles updated: {', '.join([r.name for r in selected_roles]) or 'none'}",
-            ephemeral=True
+        # Single-select clicks replace each other across the whole selector;
+        # multi-select picks only replace earlier picks from the same menu.
+        if self.multiple:
+            scope = (interaction.message.id if interaction.message else None, self.custom_id)
+        else:
+            scope = tuple(self.scope_ids)
+        role_queue.submit(
+            interaction, member,
+            add=selected_roles,
+            remove=unselected,
+            summary=f"✅ Roles updated: {', '.join([r.name for r in selected_roles]) or 'none'}",
+            scope=scope,
         )
 
 class RoleDropdownView(discord.ui.View):
+    """Selector message view: up to five 25-option menus, or four plus a pager for larger selectors."""
+
     def __init__(self, roles, multiple: bool):
         super().__init__(timeout=None)
-        self.add_item(RoleDropdown(roles, multiple))
+        scope_ids = [role.id for role in roles]
+        shards = _chunks(roles)
+        if len(shards) > MAX_SELECT_ROWS:
+            shards = shards[:MAX_SELECT_ROWS - 1]
+            self.add_item(MoreRolesButton(roles[len(shards) * SELECT_LIMIT:], multiple, scope_ids))
+        for shard, options in enumerate(shards):
+            self.add_item(RoleDropdown(options, multiple, shard, scope_ids))
+
+class MoreRolesButton(discord.ui.Button):
+    def __init__(self, roles, multiple: bool, scope_ids):
+        super().__init__(label=f"More roles ({len(roles)})…", style=discord.ButtonStyle.secondary,
+                         custom_id=_custom_id(multiple, "more"), row=MAX_SELECT_ROWS - 1)
+        self.roles = roles
+        self.multiple = multiple
+        self.scope_ids = scope_ids
+
+    async def callback(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        roles = [r for r in map(guild.get_role, (r.id for r in self.roles)) if r is not None]
+        if not roles:
+            # Deleted since the selector was posted.
+            return await interaction.response.send_message("ℹ️ There are no more roles to pick from.", ephemeral=True)
+        await interaction.response.send_message(
+            "Pick from the remaining roles:", view=RolePagerView(roles, self.multiple, self.scope_ids), ephemeral=True
+        )
+
+class RolePagerView(discord.ui.View):
+    """Ephemeral pager over the roles that don't fit on the selector message.
+
+    Paging swaps the options of its single menu and re-sends the same view,
+    so only one component is rebuilt per click.
+    """
+
+    def __init__(self, roles, multiple: bool, scope_ids, page: int = 0):
+        super().__init__(timeout=15 * 60)
+        self.pages = _chunks(roles)
+        self.page = page
+        self.dropdown = RoleDropdown(self.pages[page], multiple, scope_ids=scope_ids,
+                                     custom_id=_custom_id(multiple, f"page:{page}"), row=0)
+        self.add_item(self.dropdown)
+        self.previous = _PageButton("◀", -1)
+        self.next = _PageButton("▶", 1)
+        self.add_item(self.previous)
+        self.add_item(self.next)
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page >= len(self.pages) - 1
+        self.dropdown.custom_id = _custom_id(self.dropdown.multiple, f"page:{self.page}")
+        self.dropdown.placeholder = f"Choose your role(s)... (page {self.page + 1}/{len(self.pages)})"
+
+    async def turn(self, interaction: discord.Interaction, step: int):
+        self.page = max(0, min(len(self.pages) - 1, self.page + step))
+        self.dropdown.set_roles(self.pages[self.page])
+        self._sync_buttons()
+        await interaction.response.edit_message(view=self)
+
+class _PageButton(discord.ui.Button):
+    def __init__(self, label: str, step: int):
+        super().__init__(label=label, style=discord.ButtonStyle.secondary, row=1)
+        self.step = step
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.view.turn(interaction, self.step)
 
 class RoleSelector(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.restore_task = None
+
+    def _restore_views(self, startup: bool = True):
+        if self.restore_task is None:
+            # Migration scans and view restores yield the REST budget to users.
+            with rest_priority(BACKGROUND):
+                restore = setup_persistent_views(self.bot) if startup else restore_persistent_views(self.bot)
+                self.restore_task = asyncio.get_running_loop().create_task(restore)
+
+    async def cog_load(self):
+        if self.bot.views_restored:
+            # Reloaded: migration already ran, just re-attach views built from this module's classes.
+            self._restore_views(startup=False)
+        elif self.bot.is_ready():
+            self._restore_views()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self._restore_views()
 
     async def _is_owner_or_admin(self, interaction: discord.Interaction):
         if interaction.user.guild_permissions.administrator:
             return True
-        owner_role = discord.utils.get(interaction.guild.roles, name=OWNER_ROLE_NAME)
-        return owner_role in interaction.user.roles if owner_role else False
+        return self.bot.role_index.has_role(interaction.user, OWNER_ROLE_NAME)
 
     # -------- CREATE --------
     @app_commands.command(name="create", description="Create a role selector dropdown.")
@@ -88,93 +218,233 @@ class RoleSelector(commands.Cog):
 
         view = RoleDropdownView(mentioned_roles, multiple)
         msg = await interaction.channel.send(embed=embed, view=view)
+        await registry.add(msg.id, interaction.guild.id, interaction.channel.id, multiple,
+                           [r.id for r in mentioned_roles])
         await interaction.response.send_message(
             f"✅ Role selector created! [Jump to message]({msg.jump_url})",
             ephemeral=True
         )
 
+    async def _scan_selectors(self, interaction: discord.Interaction, depth, days, on_progress):
+        """Page through channel history and yield role selector messages."""
+        after = discord.utils.utcnow() - datetime.timedelta(days=days) if days else None
+        scanned = 0
+        last_report = time.monotonic()
+        async for message in interaction.channel.history(limit=depth or None, after=after, oldest_first=False):
+            scanned += 1
+            if message.author == interaction.client.user and _selector_info(message):
+                yield message
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                await on_progress(scanned)
+
     # -------- LIST --------
     @app_commands.command(name="list", description="List all role selector messages in this channel.")
-    async def list_role_selectors(self, interaction: discord.Interaction):
+    @app_commands.describe(
+        depth=f"Max messages to scan (default {SCAN_DEPTH}, 0 for full history)",
+        days="Only scan messages from the last N days"
+    )
+    async def list_role_selectors(self, interaction: discord.Interaction, depth: int = SCAN_DEPTH, days: int = 0):
         if not await self._is_owner_or_admin(interaction):
             return await interaction.response.send_message("❌ You lack permission.", ephemeral=True)
 
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        progress = await interaction.followup.send("🔎 Scanning channel history...", ephemeral=True, wait=True)
+
+        async def report(scanned):
+            await progress.edit(content=f"🔎 Scanned {scanned} message(s), found {len(found)} selector(s)...")
+
         found = []
-        async for message in interaction.channel.history(limit=100):
-            if message.author == interaction.client.user and message.components:
-                for row in message.components:
-                    for comp in row.children:
-                        if isinstance(comp, discord.ui.Select) and comp.custom_id.startswith("role_dropdown_"):
-                            select_type = "Single" if comp.max_values == 1 else "Multiple"
-                            link = f"[Jump](https://discord.com/channels/{interaction.guild.id}/{interaction.channel.id}/{message.id})"
-                            found.append(f"🆔 `{message.id}` — **{select_type}** ({len(comp.options)} roles) {link}")
-            elif (
-                message.author == interaction.client.user
-                and message.embeds
-                and message.embeds[0].footer
-                and message.embeds[0].footer.text
-                and "Selection mode:" in message.embeds[0].footer.text
-            ):
-                select_type = "Single" if "Single" in message.embeds[0].footer.text else "Multiple"
-                link = f"[Jump](https://discord.com/channels/{interaction.guild.id}/{interaction.channel.id}/{message.id})"
-                found.append(f"🆔 `{message.id}` — **{select_type}** (Embed only) {link}")
+        async for message in self._scan_selectors(interaction, depth, days, report):
+            select_type, role_count = _selector_info(message)
+            details = f"({role_count} roles)" if role_count is not None else "(Embed only)"
+            found.append(f"🆔 `{message.id}` — **{select_type}** {details} [Jump]({message.jump_url})")
 
         if not found:
-            return await interaction.response.send_message("⚠️ No role selectors found.", ephemeral=True)
+            return await progress.edit(content="⚠️ No role selectors found.")
+
+        description = ""
+        for i, line in enumerate(found):
+            if len(description) + len(line) > 3900:
+                description += f"…and {len(found) - i} more."
+                break
+            description += line + "\n"
 
         embed = discord.Embed(
             title=f"Role Selectors in #{interaction.channel.name}",
-            description="\n".join(found),
+            description=description,
             color=discord.Color.green()
         )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await progress.edit(content=None, embed=embed)
 
     # -------- CLEANUP --------
     @app_commands.command(name="cleanup", description="Remove broken or orphaned role selectors in this channel.")
-    async def cleanup_role_selectors(self, interaction: discord.Interaction):
+    @app_commands.describe(
+        depth=f"Max messages to scan (default {SCAN_DEPTH}, 0 for full history)",
+        days="Only scan messages from the last N days"
+    )
+    async def cleanup_role_selectors(self, interaction: discord.Interaction, depth: int = SCAN_DEPTH, days: int = 0):
         if not await self._is_owner_or_admin(interaction):
             return await interaction.response.send_message("❌ You lack permission.", ephemeral=True)
 
-        deleted = 0
-        async for message in interaction.channel.history(limit=100):
-            if (
-                message.author == interaction.client.user
-                and (message.components or message.embeds)
-                and (
-                    (message.components and any(
-                        isinstance(c, discord.ui.Select) and c.custom_id.startswith("role_dropdown_")
-                        for row in message.components for c in row.children
-                    ))
-                    or (
-                        message.embeds
-                        and message.embeds[0].footer
-                        and "Selection mode:" in message.embeds[0].footer.text
-                    )
-                )
-            ):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        progress = await interaction.followup.send("🧹 Scanning channel history...", ephemeral=True, wait=True)
+        channel = interaction.channel
+        deleted = []
+        failed = []
+        batch = []
+        bulk_allowed = True
+
+        async def delete_one(message):
+            try:
                 await message.delete()
-                deleted += 1
+                deleted.append(message.id)
+            except discord.NotFound:
+                deleted.append(message.id)  # already gone; still drop it from the registry
+            except discord.HTTPException:
+                failed.append(message.id)
+
+        async def flush():
+            nonlocal bulk_allowed
+            if not batch:
+                return
+            if bulk_allowed:
+                try:
+                    await channel.delete_messages(batch)
+                    deleted.extend(m.id for m in batch)
+                    batch.clear()
+                    return
+                except discord.Forbidden:
+                    bulk_allowed = False  # needs Manage Messages; fall back to single deletes
+                except discord.HTTPException:
+                    pass  # e.g. a message aged past the bulk window mid-scan; retry this batch one by one
+            for message in batch:
+                await delete_one(message)
+            batch.clear()
+
+        async def report(scanned):
+            await progress.edit(content=f"🧹 Scanned {scanned} message(s), deleted {len(deleted)} so far...")
+
+        bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        try:
+            async for message in self._scan_selectors(interaction, depth, days, report):
+                if message.created_at > bulk_cutoff:
+                    batch.append(message)
+                    if len(batch) >= 100:
+                        await flush()
+                else:
+                    await delete_one(message)
+            await flush()
+        finally:
+            # Whatever happened mid-scan, forget what was deleted and tell the user.
+            await registry.remove(*deleted)
+            summary = f"🧹 Cleaned up {len(deleted)} role selector message(s)."
+            if failed:
+                summary += f" ⚠️ {len(failed)} couldn't be deleted."
+            await progress.edit(content=summary)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.message_id in registry.known_ids:
+            await registry.remove(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        await registry.remove(*(payload.message_ids & registry.known_ids))
+
+def _selector_info(message: discord.Message):
+    """Return (mode label, role count or None) for a selector message, or None if it isn't one."""
+    found = _selector_roles_from_message(message)
+    if found:
+        multiple, role_ids = found
+        return ("Multiple" if multiple else "Single"), len(role_ids)
+    if (
+        message.embeds
+        and message.embeds[0].footer
+        and message.embeds[0].footer.text
+        and "Selection mode:" in message.embeds[0].footer.text
+    ):
+        return ("Single" if "Single" in message.embeds[0].footer.text else "Multiple"), None
+    return None
+
+
+def _selector_roles_from_message(message: discord.Message):
+    """Return (multiple, role_ids) for a selector message, or None if it isn't one."""
+    found = None
+    for row in message.components:
+        for comp in getattr(row, "children", []):
+            if isinstance(comp, discord.SelectMenu) and comp.custom_id and comp.custom_id.startswith("role_dropdown_"):
+                if found is None:
+                    found = (comp.custom_id.startswith("role_dropdown_multi"), [])
+                found[1].extend(int(o.value) for o in comp.options)  # every shard of a multi-menu selector
+    return found
+
+
+async def _migrate_channel(bot: commands.Bot, guild: discord.Guild, channel, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        try:
+            async for message in channel.history(limit=SCAN_DEPTH or None):
+                if message.author != bot.user:
+                    continue
+                found = _selector_roles_from_message(message)
+                if found:
+                    multiple, role_ids = found
+                elif (
+                    message.embeds
+                    and message.embeds[0].footer
+                    and message.embeds[0].footer.text
+                    and "Selection mode:" in message.embeds[0].footer.text
+                ):
+                    # Legacy embed without a usable dropdown: attach one once so it can be restored later.
+                    multiple = "Multiple" in message.embeds[0].footer.text
+                    roles = [r for r in guild.roles if r.name not in ("@everyone", OWNER_ROLE_NAME)]
+                    await message.edit(view=RoleDropdownView(roles, multiple))
+                    role_ids = [r.id for r in roles]
+                else:
+                    continue
+                await registry.add(message.id, guild.id, channel.id, multiple, role_ids)
+        except discord.HTTPException:
+            pass
+
+
+async def migrate_selector_registry(bot: commands.Bot):
+    """One-time scan that fills the registry with selectors created before it existed."""
+    migrated = await registry.migrated_guilds()
+    pending = [g for g in bot.guilds if g.id not in migrated]
+    if not pending:
+        return
+
+    print(f"🔎 Migrating role selectors for {len(pending)} guild(s)...")
+    semaphore = asyncio.Semaphore(MIGRATION_CONCURRENCY)
+    for guild in pending:
+        await asyncio.gather(*(
+            _migrate_channel(bot, guild, channel, semaphore) for channel in guild.text_channels
+        ))
+        await registry.mark_migrated(guild.id)
 
-        await interaction.response.send_message(f"🧹 Cleaned up {deleted} role selector message(s).", ephemeral=True)
 
 async def setup_persistent_views(bot: commands.Bot):
     await bot.wait_until_ready()
-    for guild in bot.guilds:
-        for channel in guild.text_channels:
-            try:
-                async for message in channel.history(limit=100):
-                    if (
-                        message.author == bot.user
-                        and message.embeds
-                        and message.embeds[0].footer
-                        and "Selection mode:" in message.embeds[0].footer.text
-                    ):
-                        multiple = "Multiple" in message.embeds[0].footer.text
-                        roles = [r for r in guild.roles if r.name not in ("@everyone", OWNER_ROLE_NAME)]
-                        await message.edit(view=RoleDropdownView(roles, multiple))
-            except Exception:
-                continue
+    await migrate_selector_registry(bot)
+    await restore_persistent_views(bot)
+
+async def restore_persistent_views(bot: commands.Bot):
+    """Attach a view to every registered selector in a cached guild."""
+    restored = 0
+    for record in await registry.all():
+        guild = bot.get_guild(record.guild_id)
+        if guild is None:
+            continue
+        # Keep deleted roles' slots so every menu keeps the custom_id it was posted with;
+        # the callbacks drop roles that no longer resolve.
+        roles = [guild.get_role(role_id) or _DeletedRole(role_id) for role_id in record.role_ids]
+        if all(isinstance(r, _DeletedRole) for r in roles):
+            continue
+        bot.add_view(RoleDropdownView(roles, record.multiple), message_id=record.message_id)
+        restored += 1
+
+    bot.views_restored = True
+    print(f"🎭 Restored {restored} role selector view(s).")
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(RoleSelector(bot))
-    bot.loop.create_task(setup_persistent_views(bot))
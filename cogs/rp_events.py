@@ -0,0 +1,299 @@
+import os
+import time
+import asyncio
+import traceback
+
+from cogs.storage import db
+from cogs.metrics import Metric, metrics
+
+# ---------------- CONFIG ----------------
+FLUSH_INTERVAL = float(os.getenv("DEMISE_RP_FLUSH_INTERVAL", 5.0))  # seconds between event log writes
+FLUSH_SIZE = 256  # buffered events before an early flush
+LEADERBOARD_SIZE = 10  # entries kept per guild and category
+# ----------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rp_events (
+    event_id  INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts        REAL    NOT NULL,
+    guild_id  INTEGER NOT NULL,
+    actor_id  INTEGER NOT NULL,
+    target_id INTEGER,
+    kind      TEXT    NOT NULL,
+    success   INTEGER NOT NULL,
+    detail    TEXT
+);
+CREATE TABLE IF NOT EXISTS rp_stats (
+    guild_id   INTEGER NOT NULL,
+    user_id    INTEGER NOT NULL,
+    kills      INTEGER NOT NULL DEFAULT 0,
+    deaths     INTEGER NOT NULL DEFAULT 0,
+    revives    INTEGER NOT NULL DEFAULT 0,
+    actions    INTEGER NOT NULL DEFAULT 0,
+    size       TEXT,
+    size_since REAL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS rp_size_time (
+    guild_id INTEGER NOT NULL,
+    user_id  INTEGER NOT NULL,
+    size     TEXT    NOT NULL,
+    seconds  REAL    NOT NULL,
+    PRIMARY KEY (guild_id, user_id, size)
+);
+"""
+
+CATEGORIES = ("kills", "deaths", "revives", "actions")
+KILLING_ACTIONS = ("step", "squish", "devour")
+
+
+class UserStats:
+    __slots__ = ("kills", "deaths", "revives", "actions", "size", "size_since", "size_seconds")
+
+    def __init__(self, kills=0, deaths=0, revives=0, actions=0, size=None, size_since=None):
+        self.kills = kills
+        self.deaths = deaths
+        self.revives = revives
+        self.actions = actions
+        self.size = size
+        self.size_since = size_since
+        self.size_seconds = {}
+
+    def time_at(self, size: str, now: float) -> float:
+        seconds = self.size_seconds.get(size, 0.0)
+        if self.size == size and self.size_since is not None:
+            seconds += now - self.size_since
+        return seconds
+
+
+class _Delta:
+    """Changes to one user's stats row since the last flush."""
+
+    __slots__ = ("kills", "deaths", "revives", "actions", "size", "size_since", "size_changed")
+
+    def __init__(self):
+        self.kills = self.deaths = self.revives = self.actions = 0
+        self.size = self.size_since = None
+        self.size_changed = False
+
+    def merge(self, newer: "_Delta"):
+        for category in CATEGORIES:
+            setattr(self, category, getattr(self, category) + getattr(newer, category))
+        if newer.size_changed:
+            self.size, self.size_since, self.size_changed = newer.size, newer.size_since, True
+
+
+class _TopK:
+    """Top LEADERBOARD_SIZE users for one counter, ties broken by user ID.
+
+    Counters only grow, so a user outside the list can only enter by
+    passing its last entry; the list stays exact without rescans.
+    """
+
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries = []  # [(value, user_id)], highest first
+
+    def update(self, user_id: int, value: int):
+        for i, (_, uid) in enumerate(self.entries):
+            if uid == user_id:
+                self.entries[i] = (value, user_id)
+                break
+        else:
+            if len(self.entries) >= LEADERBOARD_SIZE and (-value, user_id) >= (-self.entries[-1][0], self.entries[-1][1]):
+                return
+            self.entries.append((value, user_id))
+        self.entries.sort(key=lambda e: (-e[0], e[1]))
+        del self.entries[LEADERBOARD_SIZE:]
+
+
+class _GuildStats:
+    __slots__ = ("users", "boards")
+
+    def __init__(self):
+        self.users = {}  # user_id -> UserStats
+        self.boards = {category: _TopK() for category in CATEGORIES}
+
+
+class RPEventLog:
+    """Append-only RP event log with per-guild aggregates kept in memory.
+
+    Events and changed aggregates are buffered and written in batches.
+    A guild's aggregates are loaded with one indexed query on first use;
+    after that /stats and /leaderboard are answered from memory. Flushes
+    add this process's deltas to the stored counters rather than
+    overwriting them, so several processes can share the database.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+        self.db.register_schema(SCHEMA)
+        self._guilds = {}  # guild_id -> _GuildStats
+        self._loading = {}  # guild_id -> task
+        self._events = []
+        self._deltas = {}  # (guild_id, user_id) -> _Delta
+        self._size_deltas = {}  # (guild_id, user_id, size) -> seconds
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self.recorded = 0
+        self.flushes = 0
+
+    # --- Loading ---
+    async def _guild(self, guild_id: int) -> _GuildStats:
+        stats = self._guilds.get(guild_id)
+        if stats is not None:
+            return stats
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = self._loading[guild_id] = asyncio.get_running_loop().create_task(self._load(guild_id))
+            task.add_done_callback(lambda _: self._loading.pop(guild_id, None))
+        return await task
+
+    async def _load(self, guild_id: int) -> _GuildStats:
+        rows = await self.db.fetchall(
+            "SELECT user_id, kills, deaths, revives, actions, size, size_since FROM rp_stats WHERE guild_id = ?",
+            (guild_id,),
+        )
+        size_rows = await self.db.fetchall(
+            "SELECT user_id, size, seconds FROM rp_size_time WHERE guild_id = ?", (guild_id,)
+        )
+        stats = _GuildStats()
+        for user_id, *values in rows:
+            stats.users[user_id] = UserStats(*values)
+        for user_id, size, seconds in size_rows:
+            stats.users.setdefault(user_id, UserStats()).size_seconds[size] = seconds
+        for user_id, user in stats.users.items():
+            for category in CATEGORIES:
+                if getattr(user, category):
+                    stats.boards[category].update(user_id, getattr(user, category))
+        self._guilds[guild_id] = stats
+        return stats
+
+    # --- Recording ---
+    def _delta(self, guild_id: int, user_id: int) -> _Delta:
+        delta = self._deltas.get((guild_id, user_id))
+        if delta is None:
+            delta = self._deltas[(guild_id, user_id)] = _Delta()
+        return delta
+
+    def _bump(self, guild: _GuildStats, guild_id: int, user_id: int, category: str):
+        user = guild.users.get(user_id)
+        if user is None:
+            user = guild.users[user_id] = UserStats()
+        value = getattr(user, category) + 1
+        setattr(user, category, value)
+        guild.boards[category].update(user_id, value)
+        delta = self._delta(guild_id, user_id)
+        setattr(delta, category, getattr(delta, category) + 1)
+
+    def _observe_size(self, guild: _GuildStats, guild_id: int, user_id: int, size, now: float):
+        user = guild.users.get(user_id)
+        if user is None:
+            user = guild.users[user_id] = UserStats()
+        if size == user.size:
+            return
+        if user.size is not None and user.size_since is not None:
+            elapsed = now - user.size_since
+            user.size_seconds[user.size] = user.size_seconds.get(user.size, 0.0) + elapsed
+            key = (guild_id, user_id, user.size)
+            self._size_deltas[key] = self._size_deltas.get(key, 0.0) + elapsed
+        user.size, user.size_since = size, now if size is not None else None
+        delta = self._delta(guild_id, user_id)
+        delta.size, delta.size_since, delta.size_changed = user.size, user.size_since, True
+
+    async def record(self, guild_id: int, actor_id: int, kind: str, *, target_id=None, success=True,
+                     detail=None, sizes=None):
+        """Log one RP event and fold it into the guild's aggregates.
+
+        `sizes` maps user IDs to the size role they were seen with, so time
+        at each size accrues without polling member roles.
+        """
+        if guild_id is None:
+            return
+        guild = await self._guild(guild_id)
+        now = time.time()
+        for user_id, size in (sizes or {}).items():
+            self._observe_size(guild, guild_id, user_id, size, now)
+
+        self._bump(guild, guild_id, actor_id, "actions")
+        if success and kind in KILLING_ACTIONS and detail == "death":
+            self._bump(guild, guild_id, actor_id, "kills")
+            self._bump(guild, guild_id, target_id, "deaths")
+        elif success and kind == "revive" and target_id is not None:
+            self._bump(guild, guild_id, actor_id, "revives")
+
+        self._events.append((now, guild_id, actor_id, target_id, kind, int(success), detail))
+        self.recorded += 1
+        self._schedule_flush()
+
+    # --- Queries (memory only once the guild is loaded) ---
+    async def stats(self, guild_id: int, user_id: int):
+        return (await self._guild(guild_id)).users.get(user_id)
+
+    async def leaderboard(self, guild_id: int, category: str):
+        """[(value, user_id)] highest first."""
+        return list((await self._guild(guild_id)).boards[category].entries)
+
+    # --- Writing ---
+    def _schedule_flush(self):
+        loop = asyncio.get_running_loop()
+        if len(self._events) >= FLUSH_SIZE:
+            loop.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(FLUSH_INTERVAL)
+        await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            events, self._events = self._events, []
+            deltas, self._deltas = self._deltas, {}
+            size_deltas, self._size_deltas = self._size_deltas, {}
+            if not (events or deltas or size_deltas):
+                return
+
+            stats_rows = [
+                (guild_id, user_id, d.kills, d.deaths, d.revives, d.actions, d.size, d.size_since, d.size_changed)
+                for (guild_id, user_id), d in deltas.items()
+            ]
+            size_rows = [(guild_id, user_id, size, seconds) for (guild_id, user_id, size), seconds in size_deltas.items()]
+            try:
+                await self.db.executebatch([
+                    ("INSERT INTO rp_events (ts, guild_id, actor_id, target_id, kind, success, detail) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", events),
+                    ("INSERT INTO rp_stats (guild_id, user_id, kills, deaths, revives, actions, size, size_since) "
+                     "VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8) "
+                     "ON CONFLICT (guild_id, user_id) DO UPDATE SET "
+                     "kills = kills + excluded.kills, deaths = deaths + excluded.deaths, "
+                     "revives = revives + excluded.revives, actions = actions + excluded.actions, "
+                     "size = CASE WHEN ?9 THEN excluded.size ELSE size END, "
+                     "size_since = CASE WHEN ?9 THEN excluded.size_since ELSE size_since END", stats_rows),
+                    ("INSERT INTO rp_size_time (guild_id, user_id, size, seconds) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT (guild_id, user_id, size) DO UPDATE SET seconds = seconds + excluded.seconds",
+                     size_rows),
+                ])
+                self.flushes += 1
+            except Exception:
+                # Rolled back as a unit, so requeueing can't write anything twice.
+                print(f"❌ Failed to write RP events:\n{traceback.format_exc()}")
+                self._events[:0] = events
+                for key, delta in deltas.items():
+                    newer = self._deltas.get(key)
+                    if newer is not None:
+                        delta.merge(newer)
+                    self._deltas[key] = delta
+                for key, seconds in size_deltas.items():
+                    self._size_deltas[key] = self._size_deltas.get(key, 0.0) + seconds
+
+    def collect(self):
+        yield Metric("demise_rp_events_total", "counter", "RP events recorded.").add(self.recorded)
+        yield Metric("demise_rp_events_buffered", "gauge", "RP events waiting to be written.").add(len(self._events))
+        yield Metric("demise_rp_flushes_total", "counter", "Batched RP event log writes.").add(self.flushes)
+        yield Metric("demise_rp_guilds_loaded", "gauge", "Guilds with aggregates in memory.").add(len(self._guilds))
+
+
+rp_log = RPEventLog()
+metrics.register(rp_log.collect)
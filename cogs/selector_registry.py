@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+from cogs.storage import db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS role_selectors (
+    message_id INTEGER PRIMARY KEY,
+    guild_id   INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    multiple   INTEGER NOT NULL,
+    role_ids   TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_role_selectors_guild ON role_selectors (guild_id);
+CREATE TABLE IF NOT EXISTS role_selector_migrations (
+    guild_id INTEGER PRIMARY KEY
+);
+"""
+
+
+@dataclass(frozen=True)
+class SelectorRecord:
+    message_id: int
+    guild_id: int
+    channel_id: int
+    multiple: bool
+    role_ids: tuple
+
+
+class SelectorRegistry:
+    """Persistent registry of role selector messages.
+
+    Written by `/create` and `/cleanup`, read on startup so persistent views
+    can be re-attached without touching channel history.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+        self.db.register_schema(SCHEMA)
+        self.known_ids = set()
+
+    async def add(self, message_id: int, guild_id: int, channel_id: int, multiple: bool, role_ids):
+        role_ids = tuple(int(r) for r in role_ids)
+        await self.db.execute(
+            "INSERT OR REPLACE INTO role_selectors (message_id, guild_id, channel_id, multiple, role_ids) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (message_id, guild_id, channel_id, int(multiple), ",".join(map(str, role_ids))),
+        )
+        self.known_ids.add(message_id)
+
+    async def remove(self, *message_ids: int):
+        if not message_ids:
+            return
+        await self.db.executemany(
+            "DELETE FROM role_selectors WHERE message_id = ?",
+            [(m,) for m in message_ids],
+        )
+        self.known_ids.difference_update(message_ids)
+
+    async def all(self):
+        rows = await self.db.fetchall(
+            "SELECT message_id, guild_id, channel_id, multiple, role_ids FROM role_selectors"
+        )
+        records = [
+            SelectorRecord(
+                message_id=row[0],
+                guild_id=row[1],
+                channel_id=row[2],
+                multiple=bool(row[3]),
+                role_ids=tuple(int(r) for r in row[4].split(",") if r),
+            )
+            for row in rows
+        ]
+        self.known_ids.update(r.message_id for r in records)
+        return records
+
+    async def migrated_guilds(self):
+        rows = await self.db.fetchall("SELECT guild_id FROM role_selector_migrations")
+        return {row[0] for row in rows}
+
+    async def mark_migrated(self, guild_id: int):
+        await self.db.execute(
+            "INSERT OR IGNORE INTO role_selector_migrations (guild_id) VALUES (?)", (guild_id,)
+        )
+
+
+registry = SelectorRegistry()
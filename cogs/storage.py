@@ -0,0 +1,81 @@
+import os
+import asyncio
+import sqlite3
+
+# ---------------- CONFIG ----------------
+DB_PATH = os.getenv("DEMISE_DB_PATH", "demise.db")
+# ----------------------------------------
+
+
+class Database:
+    """Small async wrapper around a single SQLite connection.
+
+    All statements run in a worker thread behind a lock so the event loop
+    never blocks on disk I/O.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._schemas = []
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for schema in self._schemas:
+                self._conn.executescript(schema)
+            self._conn.commit()
+        return self._conn
+
+    def register_schema(self, schema: str):
+        """Register DDL that is applied (idempotently) when the DB is opened."""
+        self._schemas.append(schema)
+        if self._conn is not None:
+            self._conn.executescript(schema)
+            self._conn.commit()
+
+    def _run(self, sql, params, many, fetch):
+        conn = self._connect()
+        cur = conn.executemany(sql, params) if many else conn.execute(sql, params)
+        rows = cur.fetchall() if fetch else None
+        conn.commit()
+        return rows
+
+    def _run_batch(self, batch):
+        conn = self._connect()
+        try:
+            for sql, seq in batch:
+                conn.executemany(sql, seq)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    async def execute(self, sql: str, params=()):
+        async with self._lock:
+            await asyncio.to_thread(self._run, sql, params, False, False)
+
+    async def executemany(self, sql: str, seq):
+        async with self._lock:
+            await asyncio.to_thread(self._run, sql, list(seq), True, False)
+
+    async def executebatch(self, batch):
+        """Run [(sql, rows)] with executemany in one transaction: all of it commits or none does."""
+        async with self._lock:
+            await asyncio.to_thread(self._run_batch, [(sql, list(seq)) for sql, seq in batch])
+
+    async def fetchall(self, sql: str, params=()):
+        async with self._lock:
+            return await asyncio.to_thread(self._run, sql, params, False, True)
+
+    async def close(self):
+        async with self._lock:
+            if self._conn is not None:
+                await asyncio.to_thread(self._conn.close)
+                self._conn = None
+
+
+db = Database()
@@ -1,21 +1,98 @@
+import os
+import json
+import asyncio
+import hashlib
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from cogs.checks import is_bot_owner
+
 DEV_GUILD_ID = 1152640567445037140
+SYNC_CACHE_PATH = os.getenv("DEMISE_SYNC_CACHE", "sync_cache.json")
+
+
+def command_hashes(tree: app_commands.CommandTree, guild=None) -> dict:
+    """Stable per-command hashes of the payloads `tree.sync(guild=...)` would upload."""
+    hashes = {}
+    for command in tree.get_commands(guild=guild):
+        data = command.to_dict(tree)
+        payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        key = f"{data.get('type', 1)}:{command.name}"
+        hashes[key] = hashlib.sha256(payload.encode()).hexdigest()
+    return hashes
+
+
+def _load_cache(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, cache: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
 
 class Sync(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.synced = False  # prevent double-syncing
+        self.cache = _load_cache(SYNC_CACHE_PATH)
+
+    def _scope_key(self, guild):
+        return f"{self.bot.application_id}:{guild.id if guild else 'global'}"
+
+    async def sync_scope(self, guild=None, force: bool = False):
+        """Sync one scope (global or a guild) only if its command payloads changed.
+
+        Returns the number of commands uploaded, or None if the sync was skipped.
+        """
+        scope = "global" if guild is None else f"guild {guild.id}"
+        key = self._scope_key(guild)
+        current = command_hashes(self.bot.tree, guild=guild)
+        stored = self.cache.get(key)
+
+        if not force and stored == current:
+            print(f"⏭️  Slash commands unchanged for {scope}, skipping sync.")
+            return None
+
+        stored = stored or {}
+        added = sorted(k.split(":", 1)[1] for k in current.keys() - stored.keys())
+        removed = sorted(k.split(":", 1)[1] for k in stored.keys() - current.keys())
+        changed = sorted(k.split(":", 1)[1] for k in current.keys() & stored.keys() if current[k] != stored[k])
+        print(
+            f"🔄 Syncing {scope}: added={added or '-'} removed={removed or '-'} changed={changed or '-'}"
+            + (" (forced)" if force else "")
+        )
+
+        synced = await self.bot.tree.sync(guild=guild)
+        self.cache[key] = current
+        await asyncio.to_thread(_save_cache, SYNC_CACHE_PATH, dict(self.cache))
+        return len(synced)
+
+    async def sync_all(self, force: bool = False):
+        results = {}
+        for guild in (None, discord.Object(id=DEV_GUILD_ID)):
+            results["global" if guild is None else guild.id] = await self.sync_scope(guild, force=force)
+        return results
 
     @commands.Cog.listener()
     async def on_ready(self):
+        shard_ids = getattr(self.bot, "shard_ids", None)
+        if shard_ids is not None and 0 not in shard_ids:
+            return  # only the cluster that owns shard 0 syncs
         if not self.synced:
             await self.bot.wait_until_ready()
             try:
-                synced = await self.bot.tree.sync(guild=discord.Object(id=DEV_GUILD_ID))
-                print(f"✅ Auto-synced {len(synced)} slash commands with guild {DEV_GUILD_ID}")
+                results = await self.sync_all()
+                for scope, count in results.items():
+                    if count is not None:
+                        print(f"✅ Auto-synced {count} slash commands ({scope})")
                 self.synced = True
             except Exception as e:
                 print(f"❌ Auto-sync failed: {e}")
@@ -24,13 +101,18 @@ class Sync(commands.Cog):
         name="sync",
         description="Sync slash commands with Discord (Owner-only, Dev Guild only)."
     )
+    @app_commands.describe(force="Upload even if the command payloads are unchanged")
     @app_commands.guilds(discord.Object(id=DEV_GUILD_ID))
-    @commands.is_owner()
-    async def sync(self, interaction: discord.Interaction):
+    @is_bot_owner()
+    async def sync(self, interaction: discord.Interaction, force: bool = False):
         await interaction.response.defer(thinking=True)
         try:
-            synced = await self.bot.tree.sync(guild=discord.Object(id=DEV_GUILD_ID))
-            await interaction.followup.send(f"✅ Synced {len(synced)} commands with Discord.")
+            results = await self.sync_all(force=force)
+            lines = [
+                f"• {scope}: " + ("unchanged, skipped" if count is None else f"synced {count} commands")
+                for scope, count in results.items()
+            ]
+            await interaction.followup.send("✅ Sync complete.\n" + "\n".join(lines))
         except Exception as e:
             await interaction.followup.send(f"❌ Sync failed: `{e}`")
 
@@ -0,0 +1,110 @@
+import os
+import time
+
+from cogs.metrics import Metric, metrics
+
+
+def _rate(env: str, default: str):
+    """Parse "capacity/seconds" (e.g. "5/10") from the environment."""
+    capacity, _, per = os.getenv(env, default).partition("/")
+    return float(capacity), float(per or 1)
+
+# ---------------- CONFIG ----------------
+USER_RATE = _rate("DEMISE_THROTTLE_USER", "8/20")        # RP actions per user
+GUILD_RATE = _rate("DEMISE_THROTTLE_GUILD", "60/20")     # RP actions per guild
+COMMAND_RATE = _rate("DEMISE_THROTTLE_COMMAND", "3/10")  # uses of one command per user
+SWEEP_INTERVAL = 60.0  # seconds between idle bucket sweeps
+# ----------------------------------------
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "refill", "tokens", "updated")
+
+    def __init__(self, capacity: float, per: float, now: float):
+        self.capacity = capacity
+        self.refill = capacity / per
+        self.tokens = capacity
+        self.updated = now
+
+    def _fill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill)
+        self.updated = now
+
+    def retry_after(self, now: float) -> float:
+        self._fill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.refill
+
+    def take(self):
+        self.tokens -= 1
+
+    def idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.refill >= self.capacity
+
+
+class Throttle:
+    """In-memory token buckets per user, per guild and per (user, command).
+
+    A call is allowed only when every bucket has a token, and only then are
+    tokens taken, so a throttled call costs nothing. Full buckets carry no
+    state and are dropped on the next sweep.
+    """
+
+    SCOPES = ("user", "guild", "command")
+
+    def __init__(self, user=USER_RATE, guild=GUILD_RATE, command=COMMAND_RATE):
+        self.rates = {"user": user, "guild": guild, "command": command}
+        self._buckets = {scope: {} for scope in self.SCOPES}
+        self._last_sweep = time.monotonic()
+        self.allowed = 0
+        self.hits = {scope: 0 for scope in self.SCOPES}
+
+    def _bucket(self, scope, key, now):
+        buckets = self._buckets[scope]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(*self.rates[scope], now)
+        return bucket
+
+    def check(self, user_id: int, guild_id, command: str) -> float:
+        """Take a token for this call, or return the seconds until it would be allowed."""
+        now = time.monotonic()
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self.sweep(now)
+
+        keys = {"user": user_id, "guild": guild_id or user_id, "command": (user_id, command)}
+        buckets = {scope: self._bucket(scope, key, now) for scope, key in keys.items()}
+        worst_scope, worst = None, 0.0
+        for scope, bucket in buckets.items():
+            wait = bucket.retry_after(now)
+            if wait > worst:
+                worst_scope, worst = scope, wait
+        if worst_scope is not None:
+            self.hits[worst_scope] += 1
+            return worst
+
+        for bucket in buckets.values():
+            bucket.take()
+        self.allowed += 1
+        return 0.0
+
+    def sweep(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        for buckets in self._buckets.values():
+            for key in [k for k, b in buckets.items() if b.idle(now)]:
+                del buckets[key]
+
+    def collect(self):
+        yield Metric("demise_throttle_allowed_total", "counter", "RP actions let through the throttle.").add(
+            self.allowed)
+        hits = Metric("demise_throttle_hits_total", "counter", "RP actions rejected, by the bucket that was empty.")
+        buckets = Metric("demise_throttle_buckets", "gauge", "Live token buckets.")
+        for scope in self.SCOPES:
+            hits.add(self.hits[scope], scope=scope)
+            buckets.add(len(self._buckets[scope]), scope=scope)
+        yield hits
+        yield buckets
+
+
+throttle = Throttle()
+metrics.register(throttle.collect)
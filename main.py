@@ -2,10 +2,9 @@ import os
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-import threading
-import http.server
-import socketserver
 import asyncio
+import multiprocessing
+import signal
 import traceback
 
 # --- Load environment variables ---
@@ -14,12 +13,37 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 if not TOKEN:
     raise ValueError("❌ No DISCORD_TOKEN found in .env file.")
 
+PORT = int(os.environ.get("PORT", 10000))
+
 # --- Intents ---
 intents = discord.Intents.default()
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# --- Cache profile ---
+# Lean mode skips member chunking and the message cache; members are fetched
+# on demand into a bounded LRU instead (see cogs/member_cache.py).
+LEAN_CACHE = os.getenv("DEMISE_LEAN_CACHE", "").lower() in ("1", "true", "yes")
+cache_options = {}
+if LEAN_CACHE:
+    cache_options = {
+        "chunk_guilds_at_startup": False,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "max_messages": None,
+    }
+
+# --- Sharding ---
+# DEMISE_SHARD_COUNT: "auto" or a number; enables AutoShardedBot.
+# DEMISE_CLUSTERS: worker processes to split the shards across (default 1).
+SHARD_COUNT = os.getenv("DEMISE_SHARD_COUNT", "").strip().lower()
+CLUSTERS = max(1, int(os.getenv("DEMISE_CLUSTERS", 1)))
+SHARDED = bool(SHARD_COUNT) or CLUSTERS > 1
+IDENTIFY_INTERVAL = 5.0  # Discord allows one IDENTIFY per 5s per concurrency bucket
+
+# --- Interactions transport ---
+# DEMISE_INTERACTIONS=http receives interactions on the Discord HTTP webhook
+# (POST /interactions on PORT) instead of the gateway; see cogs/http_interactions.py.
+HTTP_INTERACTIONS = os.getenv("DEMISE_INTERACTIONS", "gateway").strip().lower() == "http"
 
 # --- Role Definitions ---
 SIZE_ORDER = ["Tiny", "Normal", "Giant", "Giantess"]
@@ -27,34 +51,101 @@ SPELLCASTER_ROLE = "Spellcaster"
 DEAD_ROLE = "Dead"
 OWNER_ROLE = "Owner"
 
+# --- Role Index (name -> ID, size ranks) ---
+from cogs.role_index import RoleIndex
+
+role_index = RoleIndex(SIZE_ORDER)
+
 def get_size_rank(member):
-    for i, size in enumerate(SIZE_ORDER):
-        if discord.utils.get(member.roles, name=size):
-            return i
-    return -1
+    return role_index.size_rank(member)
 
 def has_role(member, role_name):
-    return discord.utils.get(member.roles, name=role_name) is not None
+    return role_index.has_role(member, role_name)
+
+def is_rp_manager(member):
+    return has_role(member, SPELLCASTER_ROLE) or has_role(member, OWNER_ROLE)
+
+# --- On-demand member cache ---
+from cogs.member_cache import member_cache
+
+# --- Role Mutations (single REST call per member update) ---
+from cogs.role_ops import mutate_roles
+
+# --- Memoized application info / static responses ---
+from cogs.response_cache import response_cache
+
+# --- RP action throttling ---
+from cogs.throttle import throttle
+
+# --- RP event log / leaderboards ---
+from cogs.rp_events import rp_log
+
+# --- Gateway session carried across restarts ---
+from cogs.gateway_session import gateway_session
+
+# --- Background mass role jobs ---
+from cogs.bulk_jobs import bulk_jobs
 
 helpers = {
     "get_size_rank": get_size_rank,
     "has_role": has_role,
+    "is_rp_manager": is_rp_manager,
+    "get_role": role_index.get_role,
+    "mutate_roles": mutate_roles,
+    "response_cache": response_cache,
+    "throttle": throttle,
+    "rp_log": rp_log,
     "SIZE_ORDER": SIZE_ORDER,
     "SPELLCASTER_ROLE": SPELLCASTER_ROLE,
     "DEAD_ROLE": DEAD_ROLE,
     "OWNER_ROLE": OWNER_ROLE,
 }
 
-# --- Register command modules ---
-import cogs.commands_user as commands_user
-import cogs.commands_admin as commands_admin
+# --- Outbound REST priority scheduler ---
+from cogs.rest_scheduler import rest_scheduler
+
+# --- Command instrumentation (latency, REST calls, rate limits) ---
+from cogs.instrumentation import InstrumentedTree, perf
+
+# --- Bot factory ---
+def create_bot(shard_ids=None, shard_count=None):
+    options = dict(command_prefix="!", intents=intents, tree_cls=InstrumentedTree,
+                   http_trace=perf.http_trace, **cache_options)
+    if SHARDED:
+        bot = commands.AutoShardedBot(shard_ids=shard_ids, shard_count=shard_count, **options)
+    else:
+        bot = commands.Bot(**options)
 
-commands_user.register(bot, helpers)
-commands_admin.register(bot, helpers)
+    rest_scheduler.install(bot)  # before perf, so command timings include queueing
+    perf.install(bot)
+    role_index.attach(bot)
+    member_cache.attach(bot)
+    response_cache.attach(bot)
+    bulk_jobs.attach(bot, is_rp_manager, SIZE_ORDER, DEAD_ROLE)
+    gateway_session.install(bot)
+    bot.role_index = role_index
+    bot.helpers = helpers  # read by the command module extensions on (re)load
+    bot.cogs_loaded = False
+    bot.views_restored = False
+
+    @bot.event
+    async def on_ready():
+        # Command sync lives in cogs/sync.py and only uploads when payloads changed.
+        print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
+
+    @bot.event
+    async def on_shard_ready(shard_id):
+        shard_guilds = sum(1 for g in bot.guilds if g.shard_id == shard_id)
+        print(f"🔷 Shard {shard_id} ready ({shard_guilds} guilds)")
+
+    return bot
 
 # --- Cog Loader with Logging ---
-async def load_extensions():
-    cogs_to_load = ["cogs.roles", "cogs.sync"]
+async def load_extensions(bot):
+    cogs_to_load = [
+        "cogs.commands_user", "cogs.commands_admin", "cogs.commands_bulk",
+        "cogs.roles", "cogs.sync", "cogs.perf", "cogs.hot_reload",
+    ]
     loaded = 0
 
     for cog in cogs_to_load:
@@ -66,37 +157,124 @@ async def load_extensions():
             print(f"❌ Failed to load cog: {cog}\n{traceback.format_exc()}")
 
     print(f"🧩 Loaded {loaded}/{len(cogs_to_load)} cogs.")
-    # ⚠️ Do NOT sync here anymore — moved to on_ready()
+    bot.cogs_loaded = loaded == len(cogs_to_load)
+    # Slash commands are synced by cogs/sync.py on the first on_ready, only when their payloads changed.
+
 
+# --- Health / readiness / metrics server (for Render etc.) ---
+from cogs.health import HealthServer
+from cogs.http_interactions import InteractionsEndpoint
 
-@bot.event
-async def on_ready():
-    print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
+# --- Graceful shutdown ---
+def handle_sigterm(bot, endpoint=None):
+    """Shut down cleanly on SIGTERM (platform redeploys), keeping the gateway session resumable."""
+    loop = asyncio.get_running_loop()
+
+    async def shutdown():
+        print("🛑 SIGTERM received, shutting down...")
+        if endpoint:
+            endpoint.close()
+        elif gateway_session.save():
+            await gateway_session.close()
+        else:
+            await bot.close()
 
     try:
-        await bot.tree.sync()
-        print("✅ Slash commands synced successfully.")
-    except Exception as e:
-        print(f"❌ Slash command sync failed:\n{traceback.format_exc()}")
+        loop.add_signal_handler(signal.SIGTERM, lambda: loop.create_task(shutdown()))
+    except NotImplementedError:
+        pass  # no loop signal handlers on Windows; keep the default behaviour
 
 
-# --- Dummy hosting server (for Repl.it/Render etc.) ---
-def run_dummy_server():
-    PORT = int(os.environ.get("PORT", 10000))
-    Handler = http.server.SimpleHTTPRequestHandler
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"🌐 Dummy server running on port {PORT}")
-        httpd.serve_forever()
+# --- Startup ---
+async def start_bot(shard_ids=None, shard_count=None, port=PORT):
+    bot = create_bot(shard_ids, shard_count)
+    health = HealthServer(bot, port)
+    endpoint = None
+    if HTTP_INTERACTIONS:
+        endpoint = InteractionsEndpoint(bot)
+        endpoint.install(health)
+    handle_sigterm(bot, endpoint)
+    await health.start()
+    try:
+        await load_extensions(bot)
+        if endpoint:
+            await endpoint.run(TOKEN)
+        else:
+            await bot.login(TOKEN)
+            await gateway_session.restore(bot)  # RESUME instead of IDENTIFY after a redeploy
+            await bot.connect()
+    finally:
+        await gateway_session.flush()
+        await rp_log.flush()
+        await health.stop()
 
-# --- Main startup ---
-def main():
-    threading.Thread(target=run_dummy_server, daemon=True).start()
 
-    async def start_bot():
-        await load_extensions()
-        await bot.start(TOKEN)
+async def recommended_shard_count():
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(TOKEN)
+        shards, _, _ = await http.get_bot_gateway()
+        return shards
+    finally:
+        await http.close()
+
+
+def split_shards(shard_count, clusters):
+    """Split shard IDs into `clusters` contiguous, near-equal ranges."""
+    clusters = min(clusters, shard_count)
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def run_cluster(cluster_id, shard_ids, shard_count):
+    # Stagger IDENTIFYs across processes; shards within a process are paced by discord.py.
+    delay = shard_ids[0] * IDENTIFY_INTERVAL
+
+    async def runner():
+        if delay:
+            await asyncio.sleep(delay)
+        print(f"🚀 Cluster {cluster_id} starting shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}")
+        await start_bot(shard_ids, shard_count, port=PORT + cluster_id)
+
+    asyncio.run(runner())
+
+
+def launch_clusters():
+    if SHARD_COUNT in ("", "auto"):
+        shard_count = max(CLUSTERS, asyncio.run(recommended_shard_count()))
+    else:
+        shard_count = int(SHARD_COUNT)
+
+    processes = [
+        multiprocessing.Process(target=run_cluster, args=(i, ids, shard_count), name=f"demise-cluster-{i}")
+        for i, ids in enumerate(split_shards(shard_count, CLUSTERS))
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for process in processes:
+        process.join()
+
+
+def main():
+    if CLUSTERS > 1:
+        launch_clusters()
+        return
 
-    asyncio.run(start_bot())
+    shard_count = int(SHARD_COUNT) if SHARD_COUNT not in ("", "auto") else None
+    asyncio.run(start_bot(shard_count=shard_count))
 
 if __name__ == "__main__":
     main()